@@ -1,15 +1,32 @@
 from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
+from flask_compress import Compress
 import os
 from config import config
+from json_provider import FastJSONProvider
+from static_assets import StaticAssets
 
-# Create Flask application
-app = Flask(__name__, static_folder='../frontend', static_url_path='')
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
+
+# Create Flask application (frontend files are served by StaticAssets below)
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = config.SECRET_KEY
+app.json = FastJSONProvider(app)
 
 # Enable CORS for API routes
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# Compress JSON and frontend assets above the size threshold.
+# Streamed NDJSON responses are left alone so they are not buffered.
+app.config['COMPRESS_ALGORITHM'] = config.COMPRESS_ALGORITHMS
+app.config['COMPRESS_MIN_SIZE'] = config.COMPRESS_MIN_SIZE
+app.config['COMPRESS_STREAMS'] = False
+app.config['COMPRESS_MIMETYPES'] = [
+    'application/json', 'text/html', 'text/css',
+    'text/javascript', 'application/javascript', 'image/svg+xml'
+]
+Compress(app)
+
 # Import route blueprints
 from routes.auth_routes import auth_bp
 from routes.zone_routes import zone_bp
@@ -29,17 +46,30 @@ app.register_blueprint(validation_bp, url_prefix='/api')
 app.register_blueprint(user_bp, url_prefix='/api')
 
 
+# Frontend files, read and precompressed once per process
+static_assets = StaticAssets(
+    FRONTEND_DIR,
+    min_size=config.COMPRESS_MIN_SIZE,
+    watch=(config.FLASK_ENV == 'development')
+)
+app.extensions['static_assets'] = static_assets
+
+
 # Serve frontend
 @app.route('/')
 def index():
     """Serve the main frontend page"""
-    return send_from_directory('../frontend', 'index.html')
+    return static_assets.response('index.html')
 
 
 @app.route('/<path:path>')
 def serve_static(path):
     """Serve static files"""
-    return send_from_directory('../frontend', path)
+    response = static_assets.response(path)
+    if response is None:
+        # Not present at startup: fall back to the filesystem
+        return send_from_directory(FRONTEND_DIR, path)
+    return response
 
 
 # Health check endpoint
@@ -72,6 +102,10 @@ if __name__ == '__main__':
     print(f"📡 Frontend available at: http://localhost:{config.FLASK_PORT}")
     print(f"🔧 API base URL: http://localhost:{config.FLASK_PORT}/api")
     
+    # Under gunicorn this runs in one worker instead (see gunicorn.conf.py)
+    from models import ensure_indexes_in_background
+    ensure_indexes_in_background()
+    
     app.run(
         host='0.0.0.0',
         port=config.FLASK_PORT,
@@ -1,9 +1,37 @@
 import jwt
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, g
 from config import config
-from models import User, EventLog
+from models import User, EventLog, RevokedToken
+from token_cache import token_cache
+from revocation import revocation_list
+from password_hasher import password_hasher
+
+# Bookkeeping writes the login response does not have to wait for
+_login_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='login-writes')
+
+
+def _reset_login_writer():
+    global _login_writer
+    _login_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='login-writes')
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_login_writer)
+
+
+def _defer(fn, *args, **kwargs):
+    """Run fn in the background, logging instead of raising on failure"""
+    def run():
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Deferred login write failed: {e}")
+    _login_writer.submit(run)
 
 
 def generate_token(username, role):
@@ -12,7 +40,8 @@ def generate_token(username, role):
         'username': username,
         'role': role,
         'exp': datetime.utcnow() + timedelta(seconds=config.JWT_ACCESS_TOKEN_EXPIRES),
-        'iat': datetime.utcnow()
+        'iat': datetime.utcnow(),
+        'jti': uuid.uuid4().hex
     }
     
     token = jwt.encode(payload, config.JWT_SECRET_KEY, algorithm='HS256')
@@ -20,20 +49,31 @@ def generate_token(username, role):
 
 
 def verify_token(token):
-    """Verify and decode JWT token"""
-    try:
-        payload = jwt.decode(token, config.JWT_SECRET_KEY, algorithms=['HS256'])
-        return {'valid': True, 'payload': payload}
-    except jwt.ExpiredSignatureError:
-        return {'valid': False, 'error': 'Token has expired'}
-    except jwt.InvalidTokenError:
-        return {'valid': False, 'error': 'Invalid token'}
+    """Verify and decode JWT token (served from the verified-token cache when possible)"""
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, config.JWT_SECRET_KEY, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            return {'valid': False, 'error': 'Token has expired'}
+        except jwt.InvalidTokenError:
+            return {'valid': False, 'error': 'Invalid token'}
+        token_cache.put(token, payload)
+    
+    if revocation_list.is_revoked(payload.get('jti')):
+        return {'valid': False, 'error': 'Token has been revoked'}
+    
+    return {'valid': True, 'payload': payload}
 
 
 def token_required(f):
     """Decorator to protect routes that require authentication"""
     @wraps(f)
     def decorated(*args, **kwargs):
+        # Already authenticated earlier in this request (stacked decorators)
+        if g.get('user') is not None:
+            return f(*args, **kwargs)
+        
         token = None
         
         # Check for token in Authorization header
@@ -73,10 +113,35 @@ def admin_required(f):
     return decorated
 
 
+def _record_login(username, rehash_password=None):
+    """Deferred part of a successful login"""
+    User.update_last_login(username)
+    
+    # Upgrade the stored hash when BCRYPT_ROUNDS has changed since it was made
+    if rehash_password is not None:
+        password_hash = password_hasher.hash(rehash_password)
+        if password_hash:
+            User.update_password_hash(username, password_hash)
+    
+    EventLog.create(
+        user=username,
+        action='login',
+        status='success'
+    )
+
+
 def login_user(username, password):
     """Authenticate user and return token"""
-    # Verify credentials
-    if not User.verify_password(username, password):
+    # One lookup serves both the password check and the role
+    user = User.find_by_username(username)
+    
+    valid = False
+    if user:
+        valid = password_hasher.check(password, user['password_hash'])
+        if valid is None:
+            return {'success': False, 'error': 'Too many logins in progress, try again shortly', 'busy': True}
+    
+    if not valid:
         EventLog.create(
             user=username,
             action='login',
@@ -85,23 +150,12 @@ def login_user(username, password):
         )
         return {'success': False, 'error': 'Invalid username or password'}
     
-    # Get user details
-    user = User.find_by_username(username)
-    if not user:
-        return {'success': False, 'error': 'User not found'}
-    
-    # Update last login
-    User.update_last_login(username)
-    
     # Generate token
     token = generate_token(username, user['role'])
     
-    # Log successful login
-    EventLog.create(
-        user=username,
-        action='login',
-        status='success'
-    )
+    # Last-login, rehash and event log writes happen after the response
+    rehash_password = password if password_hasher.needs_rehash(user['password_hash']) else None
+    _defer(_record_login, username, rehash_password)
     
     return {
         'success': True,
@@ -113,8 +167,28 @@ def login_user(username, password):
     }
 
 
-def logout_user(username):
-    """Log user logout event"""
+def revoke_token(payload):
+    """Put a token's jti on the deny-list until the token would have expired"""
+    jti = payload.get('jti')
+    if not jti:
+        return {'success': False, 'error': 'Token has no jti'}
+    
+    if payload.get('exp'):
+        expires_at = datetime.utcfromtimestamp(payload['exp'])
+    else:
+        expires_at = datetime.utcnow() + timedelta(seconds=config.JWT_ACCESS_TOKEN_EXPIRES)
+    
+    revocation_list.add(jti, expires_at)
+    return RevokedToken.revoke(jti, payload.get('username'), expires_at)
+
+
+def logout_user(username, payload=None):
+    """Revoke the caller's token and log the logout event"""
+    if payload:
+        result = revoke_token(payload)
+        if not result['success']:
+            print(f"Token revocation error: {result['error']}")
+    
     EventLog.create(
         user=username,
         action='logout',
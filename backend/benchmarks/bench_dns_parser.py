@@ -0,0 +1,297 @@
+"""
+Benchmark: single-pass DNSParser.parse against the original multi-pass parser.
+
+Usage (from the backend directory):
+    python benchmarks/bench_dns_parser.py [--records 100000] [--repeat 3]
+
+A synthetic zone is generated in a temporary directory, parsed by both
+implementations, the outputs are compared for equality and the best
+wall-clock time of each is reported.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dns_parser import DNSParser  # noqa: E402
+
+
+class LegacyDNSParser(DNSParser):
+    """The original regex-per-record-type parser, kept here for comparison"""
+    
+    def parse(self):
+        """Parse the zone file and extract all records"""
+        if not os.path.exists(self.zone_file_path):
+            raise FileNotFoundError(f"Zone file not found: {self.zone_file_path}")
+        
+        with open(self.zone_file_path, 'r') as f:
+            content = f.read()
+        
+        self.records = []
+        self.soa = None
+        self.ttl = None
+        
+        # Extract TTL
+        ttl_match = re.search(r'^\$TTL\s+(\d+)', content, re.MULTILINE)
+        if ttl_match:
+            self.ttl = ttl_match.group(1)
+        
+        # Extract SOA record - Try strict pattern first (with comments), then loose pattern
+        soa_pattern_strict = r'@\s+IN\s+SOA\s+(\S+)\s+(\S+)\s+\(\s*(\d+)\s*;\s*Serial.*?(\d+).*?(\d+).*?(\d+).*?(\d+).*?\)'
+        soa_pattern_loose = r'@\s+IN\s+SOA\s+(\S+)\s+(\S+)\s+\(\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*\)'
+        
+        # Normalize content to handle newlines within parentheses easier
+        content_normalized = content
+        
+        match = re.search(soa_pattern_strict, content, re.DOTALL | re.IGNORECASE)
+        if not match:
+             # Try loose pattern (without relying on comments)
+            match = re.search(soa_pattern_loose, content, re.DOTALL | re.IGNORECASE)
+            
+        if match:
+            self.soa = {
+                'type': 'SOA',
+                'primary_ns': match.group(1),
+                'admin_email': match.group(2),
+                'serial': match.group(3),
+                'refresh': match.group(4),
+                'retry': match.group(5),
+                'expire': match.group(6),
+                'minimum': match.group(7)
+            }
+        
+        # Parse different record types
+        self._parse_ns_records(content)
+        self._parse_a_records(content)
+        self._parse_aaaa_records(content)
+        self._parse_mx_records(content)
+        self._parse_txt_records(content)
+        self._parse_srv_records(content)
+        self._parse_cname_records(content)
+        self._parse_ptr_records(content)
+        
+        return {
+            'ttl': self.ttl,
+            'soa': self.soa,
+            'records': self.records
+        }
+    
+    
+    def _extract_comment(self, line):
+        """Extract inline comment from a record line"""
+        # Find comment after the record data (anything after ;)
+        if ';' in line:
+            parts = line.split(';', 1)
+            if len(parts) > 1:
+                return parts[1].strip()
+        return None
+    
+    def _parse_ns_records(self, content):
+        """Parse NS records"""
+        pattern = r'^(\S+)\s+IN\s+NS\s+(\S+)(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'NS',
+                'name': match.group(1),
+                'nameserver': match.group(2)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+    
+    def _parse_a_records(self, content):
+        """Parse A records"""
+        pattern = r'^(\S+)\s+IN\s+A\s+(\d+\.\d+\.\d+\.\d+)(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'A',
+                'name': match.group(1),
+                'ipv4': match.group(2)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+    
+    def _parse_aaaa_records(self, content):
+        """Parse AAAA records"""
+        pattern = r'^(\S+)\s+IN\s+AAAA\s+([0-9a-fA-F:]+)(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'AAAA',
+                'name': match.group(1),
+                'ipv6': match.group(2)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+    
+    def _parse_mx_records(self, content):
+        """Parse MX records"""
+        pattern = r'^(\S+)\s+IN\s+MX\s+(\d+)\s+(\S+)(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'MX',
+                'name': match.group(1),
+                'priority': int(match.group(2)),
+                'mailserver': match.group(3)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+    
+    def _parse_txt_records(self, content):
+        """Parse TXT records (including multi-line)"""
+        # Single-line TXT
+        pattern = r'^(\S+)\s+TXT\s+"([^"]+)"(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'TXT',
+                'name': match.group(1),
+                'text': match.group(2)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+        
+        # Multi-line TXT (parentheses)
+        multi_pattern = r'^(\S+)\s+IN\s+TXT\s+\((.*?)\)'
+        for match in re.finditer(multi_pattern, content, re.DOTALL | re.MULTILINE):
+            name = match.group(1)
+            text_content = match.group(2)
+            # Extract all quoted strings and join them
+            text_parts = re.findall(r'"([^"]*)"', text_content)
+            combined_text = ''.join(text_parts)
+            self.records.append({
+                'type': 'TXT',
+                'name': name,
+                'text': combined_text
+            })
+    
+    def _parse_srv_records(self, content):
+        """Parse SRV records"""
+        pattern = r'^(\S+)\s+SRV\s+(\d+)\s+(\d+)\s+(\d+)\s+(\S+)(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'SRV',
+                'name': match.group(1),
+                'priority': int(match.group(2)),
+                'weight': int(match.group(3)),
+                'port': int(match.group(4)),
+                'target': match.group(5)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+    
+    def _parse_cname_records(self, content):
+        """Parse CNAME records"""
+        pattern = r'^(\S+)\s+IN\s+CNAME\s+(\S+)(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'CNAME',
+                'name': match.group(1),
+                'target': match.group(2)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+    
+    def _parse_ptr_records(self, content):
+        """Parse PTR records"""
+        pattern = r'^(\d+)\s+IN\s+PTR\s+(\S+)(.*)$'
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            record = {
+                'type': 'PTR',
+                'ip_octet': match.group(1),
+                'fqdn': match.group(2)
+            }
+            comment = self._extract_comment(match.group(0))
+            if comment:
+                record['comment'] = comment
+            self.records.append(record)
+
+
+def generate_zone(path, count):
+    """Write a synthetic zone file with roughly `count` records"""
+    lines = [
+        "$TTL 86400",
+        "@   IN  SOA ns1.example.com. admin.example.com. (",
+        "        2024010100  ; Serial",
+        "        3600        ; Refresh",
+        "        1800        ; Retry",
+        "        604800      ; Expire",
+        "        86400 )     ; Minimum TTL",
+        "",
+        "@   IN  NS  ns1.example.com.",
+        "@   IN  NS  ns2.example.com.",
+        "@   IN  MX  10 mail.example.com.",
+        "_sip._tcp SRV 10 60 5060 sip.example.com.",
+        "@ TXT \"v=spf1 mx -all\"",
+        "dkim IN TXT (",
+        '  "v=DKIM1; k=rsa; p=MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQC"',
+        '  "abcdefghijklmnopqrstuvwxyz0123456789" )',
+        "",
+    ]
+    for i in range(count):
+        kind = i % 10
+        if kind < 6:
+            lines.append(f"host{i:<11} IN A 10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255} ; host {i}")
+        elif kind < 8:
+            lines.append(f"host{i:<11} IN AAAA 2001:db8::{i:x}")
+        elif kind == 8:
+            lines.append(f"alias{i:<10} IN CNAME host{i - 1}.example.com.")
+        else:
+            lines.append(f"{i % 256:<15} IN PTR host{i}.example.com.")
+    
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def best_time(parser_cls, path, repeat):
+    """Return (best seconds, last result) over `repeat` runs"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parser_cls(path).parse()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--records', type=int, default=100000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.example.com.hosts')
+        generate_zone(path, args.records)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        
+        legacy_time, legacy_result = best_time(LegacyDNSParser, path, args.repeat)
+        new_time, new_result = best_time(DNSParser, path, args.repeat)
+    
+    print(f"Zone: {args.records} records, {size_mb:.1f} MB")
+    print(f"Legacy multi-pass parse: {legacy_time * 1000:8.1f} ms")
+    print(f"Single-pass parse:       {new_time * 1000:8.1f} ms")
+    print(f"Speedup:                 {legacy_time / new_time:8.2f}x")
+    print(f"Identical output:        {legacy_result == new_result}")
+    
+    return 0 if legacy_result == new_result else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
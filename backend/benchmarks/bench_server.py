@@ -0,0 +1,105 @@
+"""
+Benchmark: request throughput of a running DNS Manager API.
+
+Usage (from the backend directory, with the server already running):
+    python benchmarks/bench_server.py [--url http://127.0.0.1:2020/api/zones]
+                                      [--concurrency 32] [--requests 2000]
+                                      [--token JWT | --user admin]
+
+Run it once against the development server (python app.py) and once against
+gunicorn (gunicorn -c gunicorn.conf.py app:app) to compare. Each client
+thread keeps one HTTP/1.1 connection open and issues GET requests back to
+back; requests per second and latency percentiles are reported.
+"""
+import argparse
+import http.client
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def run_client(url, headers, count, latencies, errors):
+    """Issue count GET requests over one keep-alive connection"""
+    parts = urlsplit(url)
+    path = parts.path + ('?' + parts.query if parts.query else '')
+    conn = None
+    
+    for _ in range(count):
+        if conn is None:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = None
+            continue
+        latencies.append(time.perf_counter() - start)
+    
+    if conn is not None:
+        conn.close()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--url', default='http://127.0.0.1:2020/api/zones')
+    arg_parser.add_argument('--concurrency', type=int, default=32)
+    arg_parser.add_argument('--requests', type=int, default=2000)
+    arg_parser.add_argument('--token', help='JWT sent as a Bearer token')
+    arg_parser.add_argument('--user', help='mint a token locally for this username (admin role)')
+    args = arg_parser.parse_args()
+    
+    headers = {}
+    token = args.token
+    if not token and args.user:
+        from auth import generate_token
+        token = generate_token(args.user, 'admin')
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    
+    per_client = max(1, args.requests // args.concurrency)
+    latencies = []
+    errors = []
+    threads = [
+        threading.Thread(target=run_client, args=(args.url, headers, per_client, latencies, errors))
+        for _ in range(args.concurrency)
+    ]
+    
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    print(f"URL:         {args.url}")
+    print(f"Clients:     {args.concurrency} x {per_client} requests")
+    print(f"Completed:   {len(latencies)} ({len(errors)} errors)")
+    print(f"Throughput:  {len(latencies) / elapsed:8.1f} req/s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:8.1f} ms")
+    print(f"Latency p99: {percentile(latencies, 99) * 1000:8.1f} ms")
+    
+    return 0 if not errors else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import os
 import subprocess
 import time
-from dns_parser import DNSParser
+from dns_parser import DNSParser, RecordIndex
+from zone_cache import zone_cache
+from zone_lock import zone_lock
 from config import config
 from models import EventLog
 
@@ -54,35 +56,98 @@ class DNSOperations:
         zone_path = os.path.join(config.NAMED_ZONE_DIR, zone_file)
         
         try:
-            parser = DNSParser(zone_path)
-            data = parser.parse()
+            data = zone_cache.get(zone_path)
             return {'success': True, 'data': data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def record_value(record):
+        """Record data as displayed, e.g. '10 mail.example.com.' for MX"""
+        fields = RecordIndex.KEY_FIELDS.get(record.get('type'), ())[1:]
+        return ' '.join(str(record.get(field, '')) for field in fields)
+    
+    @staticmethod
+    def query_records(records, types=None, search=None, name=None, name_prefix=None,
+                      value=None, sort=None, descending=False, offset=0, limit=None):
+        """
+        Filter, sort and page a parsed record list.
+        All text matches are case-insensitive; `search` matches name, value or type.
+        Returns (page, total_matching).
+        """
+        types = {t.upper() for t in types} if types else None
+        search = search.lower() if search else None
+        name = name.lower() if name else None
+        name_prefix = name_prefix.lower() if name_prefix else None
+        value = value.lower() if value else None
+        
+        matched = []
+        for record in records:
+            if types and record.get('type') not in types:
+                continue
+            
+            owner = str(record.get('ip_octet') if record.get('type') == 'PTR' else record.get('name', '')).lower()
+            if name and name not in owner:
+                continue
+            if name_prefix and not owner.startswith(name_prefix):
+                continue
+            
+            if value or search:
+                rdata = DNSOperations.record_value(record).lower()
+                if value and value not in rdata:
+                    continue
+                if search and search not in owner and search not in rdata and search not in record.get('type', '').lower():
+                    continue
+            
+            matched.append(record)
+        
+        if sort == 'name':
+            matched.sort(key=lambda r: str(r.get('ip_octet') if r.get('type') == 'PTR' else r.get('name', '')).lower(),
+                         reverse=descending)
+        elif sort == 'type':
+            matched.sort(key=lambda r: r.get('type', ''), reverse=descending)
+        elif sort == 'value':
+            matched.sort(key=lambda r: DNSOperations.record_value(r).lower(), reverse=descending)
+        elif descending:
+            matched.reverse()
+        
+        total = len(matched)
+        end = offset + limit if limit is not None else None
+        return matched[offset:end], total
+    
     @staticmethod
     def add_record(zone_file, record, username):
         """Add a new DNS record to a zone"""
         zone_path = os.path.join(config.NAMED_ZONE_DIR, zone_file)
         
         try:
-            # Parse existing zone
-            parser = DNSParser(zone_path)
-            data = parser.parse()
-            
-            # Add new record
-            data['records'].append(record)
-            
-            # Check if SOA exists
-            if not data.get('soa'):
-                return {'success': False, 'error': 'SOA record not found in zone file. Cannot update serial.'}
-            
-            # Increment serial number
-            new_serial = DNSParser.increment_serial(data['soa']['serial'])
-            data['soa']['serial'] = new_serial
-            
-            # Write updated zone file
-            parser.write_zone_file(zone_path, data['ttl'], data['soa'], data['records'])
+            # Serialize read-modify-write with other requests/workers on this zone
+            with zone_lock(zone_path):
+                # Parse existing zone (cached parse and record index)
+                parser = DNSParser(zone_path)
+                cached, index = zone_cache.get_indexed(zone_path)
+                
+                # Reject exact duplicates (same type, owner and rdata)
+                if index.contains(record):
+                    return {'success': False, 'error': 'Record already exists', 'duplicate': True}
+                
+                # Add new record
+                data = zone_cache.copy_zone(cached)
+                data['records'].append(record)
+                
+                # Check if SOA exists
+                if not data.get('soa'):
+                    return {'success': False, 'error': 'SOA record not found in zone file. Cannot update serial.'}
+                
+                # Increment serial number
+                new_serial = DNSParser.increment_serial(data['soa']['serial'])
+                data['soa']['serial'] = new_serial
+                
+                # Append in place when possible, otherwise rewrite the zone file
+                layout, identity = zone_cache.get_layout(zone_path, cached)
+                if not parser.patch_zone_file(layout, identity, [(None, None, record)], new_serial):
+                    parser.write_zone_file(zone_path, data['ttl'], data['soa'], data['records'])
+                zone_cache.invalidate(zone_path)
             
             # Log event
             EventLog.create(
@@ -114,31 +179,35 @@ class DNSOperations:
         zone_path = os.path.join(config.NAMED_ZONE_DIR, zone_file)
         
         try:
-            # Parse existing zone
-            parser = DNSParser(zone_path)
-            data = parser.parse()
-            
-            # Find and update the record
-            record_found = False
-            for i, rec in enumerate(data['records']):
-                if DNSOperations._records_match(rec, old_record):
-                    data['records'][i] = new_record
-                    record_found = True
-                    break
-            
-            if not record_found:
-                return {'success': False, 'error': 'Record not found'}
-            
-            # Check if SOA exists
-            if not data.get('soa'):
-                return {'success': False, 'error': 'SOA record not found in zone file. Cannot update serial.'}
-            
-            # Increment serial number
-            new_serial = DNSParser.increment_serial(data['soa']['serial'])
-            data['soa']['serial'] = new_serial
-            
-            # Write updated zone file
-            parser.write_zone_file(zone_path, data['ttl'], data['soa'], data['records'])
+            # Serialize read-modify-write with other requests/workers on this zone
+            with zone_lock(zone_path):
+                # Parse existing zone (cached parse and record index)
+                parser = DNSParser(zone_path)
+                cached, index = zone_cache.get_indexed(zone_path)
+                
+                # Find and update the first matching record
+                positions = index.find_all(old_record, DNSOperations._records_match)
+                if not positions:
+                    return {'success': False, 'error': 'Record not found'}
+                
+                new_record = DNSOperations._keep_ttl(cached['records'][positions[0]], new_record)
+                data = zone_cache.copy_zone(cached)
+                data['records'][positions[0]] = new_record
+                
+                # Check if SOA exists
+                if not data.get('soa'):
+                    return {'success': False, 'error': 'SOA record not found in zone file. Cannot update serial.'}
+                
+                # Increment serial number
+                new_serial = DNSParser.increment_serial(data['soa']['serial'])
+                data['soa']['serial'] = new_serial
+                
+                # Patch the record's line in place when possible, otherwise rewrite the zone file
+                layout, identity = zone_cache.get_layout(zone_path, cached)
+                edits = [(positions[0], cached['records'][positions[0]], new_record)]
+                if not parser.patch_zone_file(layout, identity, edits, new_serial):
+                    parser.write_zone_file(zone_path, data['ttl'], data['soa'], data['records'])
+                zone_cache.invalidate(zone_path)
             
             # Log event
             EventLog.create(
@@ -168,27 +237,35 @@ class DNSOperations:
         zone_path = os.path.join(config.NAMED_ZONE_DIR, zone_file)
         
         try:
-            # Parse existing zone
-            parser = DNSParser(zone_path)
-            data = parser.parse()
-            
-            # Find and remove the record
-            initial_count = len(data['records'])
-            data['records'] = [r for r in data['records'] if not DNSOperations._records_match(r, record)]
-            
-            if len(data['records']) == initial_count:
-                return {'success': False, 'error': 'Record not found'}
-            
-            # Check if SOA exists
-            if not data.get('soa'):
-                return {'success': False, 'error': 'SOA record not found in zone file. Cannot update serial.'}
-            
-            # Increment serial number
-            new_serial = DNSParser.increment_serial(data['soa']['serial'])
-            data['soa']['serial'] = new_serial
-            
-            # Write updated zone file
-            parser.write_zone_file(zone_path, data['ttl'], data['soa'], data['records'])
+            # Serialize read-modify-write with other requests/workers on this zone
+            with zone_lock(zone_path):
+                # Parse existing zone (cached parse and record index)
+                parser = DNSParser(zone_path)
+                cached, index = zone_cache.get_indexed(zone_path)
+                
+                # Find and remove every matching record
+                positions = index.find_all(record, DNSOperations._records_match)
+                if not positions:
+                    return {'success': False, 'error': 'Record not found'}
+                
+                data = zone_cache.copy_zone(cached)
+                for position in reversed(positions):
+                    del data['records'][position]
+                
+                # Check if SOA exists
+                if not data.get('soa'):
+                    return {'success': False, 'error': 'SOA record not found in zone file. Cannot update serial.'}
+                
+                # Increment serial number
+                new_serial = DNSParser.increment_serial(data['soa']['serial'])
+                data['soa']['serial'] = new_serial
+                
+                # Cut the record's lines in place when possible, otherwise rewrite the zone file
+                layout, identity = zone_cache.get_layout(zone_path, cached)
+                edits = [(position, cached['records'][position], None) for position in positions]
+                if not parser.patch_zone_file(layout, identity, edits, new_serial):
+                    parser.write_zone_file(zone_path, data['ttl'], data['soa'], data['records'])
+                zone_cache.invalidate(zone_path)
             
             # Log event
             EventLog.create(
@@ -212,6 +289,144 @@ class DNSOperations:
             )
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def apply_batch(zone_file, operations, username):
+        """
+        Apply an ordered list of add/update/delete operations to a zone with
+        one parse, one write and one serial bump. All-or-nothing: if any
+        operation is invalid or does not match, the zone file is left untouched.
+        
+        Operation format:
+            {'op': 'add', 'record': {...}}
+            {'op': 'update', 'old_record': {...}, 'new_record': {...}}
+            {'op': 'delete', 'record': {...}}
+        """
+        zone_path = os.path.join(config.NAMED_ZONE_DIR, zone_file)
+        
+        if not isinstance(operations, list) or not operations:
+            return {'success': False, 'error': 'operations must be a non-empty list', 'index': None}
+        
+        if len(operations) > config.BATCH_MAX_OPERATIONS:
+            return {
+                'success': False,
+                'error': f'Too many operations (max {config.BATCH_MAX_OPERATIONS})',
+                'index': None
+            }
+        
+        # Validate every operation before touching the zone
+        for i, op in enumerate(operations):
+            error = DNSOperations._validate_batch_operation(op)
+            if error:
+                return {'success': False, 'error': f'Operation {i}: {error}', 'index': i}
+        
+        try:
+            # Serialize read-modify-write with other requests/workers on this zone
+            with zone_lock(zone_path):
+                # Parse existing zone (private copy of the cached parse)
+                parser = DNSParser(zone_path)
+                data = zone_cache.get(zone_path, copy=True)
+                
+                # Check if SOA exists
+                if not data.get('soa'):
+                    return {'success': False, 'error': 'SOA record not found in zone file. Cannot update serial.'}
+                
+                index = RecordIndex(data['records'])
+                summary = {'add': 0, 'update': 0, 'delete': 0}
+                
+                for i, op in enumerate(operations):
+                    action = op['op']
+                    
+                    if action == 'add':
+                        if index.contains(op['record']):
+                            return {'success': False, 'error': f'Operation {i}: Record already exists', 'index': i}
+                        index.add(op['record'])
+                    
+                    elif action == 'update':
+                        positions = index.find_all(op['old_record'], DNSOperations._records_match)
+                        if not positions:
+                            return {'success': False, 'error': f'Operation {i}: Record not found', 'index': i}
+                        index.replace(positions[0], DNSOperations._keep_ttl(index.records[positions[0]], op['new_record']))
+                    
+                    elif action == 'delete':
+                        positions = index.find_all(op['record'], DNSOperations._records_match)
+                        if not positions:
+                            return {'success': False, 'error': f'Operation {i}: Record not found', 'index': i}
+                        for position in positions:
+                            index.remove(position)
+                    
+                    summary[action] += 1
+                
+                records = index.compact()
+                
+                # Increment serial number once for the whole batch
+                new_serial = DNSParser.increment_serial(data['soa']['serial'])
+                data['soa']['serial'] = new_serial
+                
+                # Write updated zone file once
+                parser.write_zone_file(zone_path, data['ttl'], data['soa'], records)
+                zone_cache.invalidate(zone_path)
+            
+            # Log a single summarized event
+            EventLog.create(
+                user=username,
+                action='batch_records',
+                status='success',
+                zone=zone_file,
+                details={'operations': len(operations), **summary}
+            )
+            
+            return {'success': True, 'serial': new_serial, 'applied': len(operations), **summary}
+        
+        except Exception as e:
+            EventLog.create(
+                user=username,
+                action='batch_records',
+                status='failure',
+                zone=zone_file,
+                details={'operations': len(operations)},
+                error_message=str(e)
+            )
+            return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def _validate_batch_operation(op):
+        """Return an error message for a malformed batch operation, or None"""
+        if not isinstance(op, dict):
+            return 'operation must be an object'
+        
+        action = op.get('op')
+        if action in ('add', 'delete'):
+            if not isinstance(op.get('record'), dict):
+                return f'{action} requires record'
+            if action == 'add':
+                validation = DNSOperations.validate_record(op['record'])
+                if not validation['valid']:
+                    return validation['error']
+        elif action == 'update':
+            if not isinstance(op.get('old_record'), dict) or not isinstance(op.get('new_record'), dict):
+                return 'update requires old_record and new_record'
+            validation = DNSOperations.validate_record(op['new_record'])
+            if not validation['valid']:
+                return validation['error']
+        else:
+            return f'Unknown op: {action}'
+        
+        return None
+    
+    @staticmethod
+    def _keep_ttl(old_record, new_record):
+        """
+        Carry the existing record's TTL over to an update that does not mention
+        one; "ttl": null or "" clears it (the zone's $TTL applies again)
+        """
+        if 'ttl' in new_record:
+            if not new_record['ttl']:
+                return {k: v for k, v in new_record.items() if k != 'ttl'}
+            return new_record
+        if old_record.get('ttl'):
+            return dict(new_record, ttl=old_record['ttl'])
+        return new_record
+    
     @staticmethod
     def _records_match(record1, record2):
         """Check if two records match (for finding/updating)"""
@@ -229,6 +444,7 @@ class DNSOperations:
     def reload_zone(zone_name, username):
         """Reload a specific zone using rndc with retry logic"""
         max_attempts = config.MAX_RELOAD_ATTEMPTS
+        started = time.monotonic()
         
         for attempt in range(1, max_attempts + 1):
             try:
@@ -246,7 +462,8 @@ class DNSOperations:
                         action='reload_zone',
                         status='success',
                         zone=zone_name,
-                        details={'attempt': attempt, 'output': result.stdout}
+                        details={'attempt': attempt, 'output': result.stdout},
+                        duration_ms=(time.monotonic() - started) * 1000
                     )
                     return {
                         'success': True,
@@ -270,7 +487,8 @@ class DNSOperations:
                     action='reload_zone',
                     status='failure',
                     zone=zone_name,
-                    error_message=str(e)
+                    error_message=str(e),
+                    duration_ms=(time.monotonic() - started) * 1000
                 )
                 return {'success': False, 'error': str(e)}
         
@@ -281,13 +499,15 @@ class DNSOperations:
             action='reload_zone',
             status='failure',
             zone=zone_name,
-            error_message=error_msg
+            error_message=error_msg,
+            duration_ms=(time.monotonic() - started) * 1000
         )
         return {'success': False, 'error': error_msg, 'attempts': max_attempts}
     
     @staticmethod
     def restart_named_service(username):
         """Restart the named service using systemctl"""
+        started = time.monotonic()
         try:
             result = subprocess.run(
                 [config.SYSTEMCTL_PATH, 'restart', 'named'],
@@ -301,7 +521,8 @@ class DNSOperations:
                     user=username,
                     action='restart_service',
                     status='success',
-                    details={'output': result.stdout}
+                    details={'output': result.stdout},
+                    duration_ms=(time.monotonic() - started) * 1000
                 )
                 return {'success': True, 'message': 'Named service restarted successfully'}
             else:
@@ -310,7 +531,8 @@ class DNSOperations:
                     user=username,
                     action='restart_service',
                     status='failure',
-                    error_message=error_msg
+                    error_message=error_msg,
+                    duration_ms=(time.monotonic() - started) * 1000
                 )
                 return {'success': False, 'error': error_msg}
         
@@ -319,7 +541,8 @@ class DNSOperations:
                 user=username,
                 action='restart_service',
                 status='failure',
-                error_message=str(e)
+                error_message=str(e),
+                duration_ms=(time.monotonic() - started) * 1000
             )
             return {'success': False, 'error': str(e)}
     
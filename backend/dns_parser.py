@@ -1,5 +1,8 @@
 import re
 import os
+import mmap
+import stat
+import tempfile
 from datetime import datetime
 from config import config
 
@@ -12,57 +15,50 @@ class DNSParser:
         self.records = []
         self.soa = None
         self.ttl = None
+        self.origin = None
+        self._last_owner = None
+        self.spans = None
+        self.soa_span = None
+        self.inheritor_starts = set()
+        self.inline_directives = False
+        self._ascii = True
+    
+    # Order in which parse() has always returned records (SOA is kept separately).
+    # Single-line and parenthesised TXT records were historically collected in
+    # two separate passes, so they keep separate buckets here.
+    PARSE_ORDER = ['NS', 'A', 'AAAA', 'MX', 'TXT', 'TXT_MULTI', 'SRV', 'CNAME', 'PTR']
+    
+    RECORD_CLASSES = ('IN', 'CH', 'HS')
+    
+    # Buffer size used when reading zone files
+    READ_CHUNK_SIZE = 64 * 1024
+    
+    _TTL_RE = re.compile(r'^\d+[smhdwSMHDW]?(?:\d+[smhdwSMHDW])*$')
+    _TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"?|;.*|[()]|[^\s;()"]+')
     
     def parse(self):
         """Parse the zone file and extract all records"""
         if not os.path.exists(self.zone_file_path):
             raise FileNotFoundError(f"Zone file not found: {self.zone_file_path}")
         
-        with open(self.zone_file_path, 'r') as f:
-            content = f.read()
+        buckets = {key: [] for key in self.PARSE_ORDER}
+        span_buckets = {key: [] for key in self.PARSE_ORDER}
         
-        self.records = []
-        self.soa = None
-        self.ttl = None
-        
-        # Extract TTL
-        ttl_match = re.search(r'^\$TTL\s+(\d+)', content, re.MULTILINE)
-        if ttl_match:
-            self.ttl = ttl_match.group(1)
+        # newline='' keeps line endings intact so offsets match the bytes on disk
+        with open(self.zone_file_path, 'r', buffering=self.READ_CHUNK_SIZE, newline='') as f:
+            for bucket, record, start, end in self._iter_parsed(f):
+                buckets[bucket].append(record)
+                span_buckets[bucket] += (start, end)
         
-        # Extract SOA record - Try strict pattern first (with comments), then loose pattern
-        soa_pattern_strict = r'@\s+IN\s+SOA\s+(\S+)\s+(\S+)\s+\(\s*(\d+)\s*;\s*Serial.*?(\d+).*?(\d+).*?(\d+).*?(\d+).*?\)'
-        soa_pattern_loose = r'@\s+IN\s+SOA\s+(\S+)\s+(\S+)\s+\(\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*\)'
+        self.records = [record for key in self.PARSE_ORDER for record in buckets[key]]
         
-        # Normalize content to handle newlines within parentheses easier
-        content_normalized = content
-        
-        match = re.search(soa_pattern_strict, content, re.DOTALL | re.IGNORECASE)
-        if not match:
-             # Try loose pattern (without relying on comments)
-            match = re.search(soa_pattern_loose, content, re.DOTALL | re.IGNORECASE)
-            
-        if match:
-            self.soa = {
-                'type': 'SOA',
-                'primary_ns': match.group(1),
-                'admin_email': match.group(2),
-                'serial': match.group(3),
-                'refresh': match.group(4),
-                'retry': match.group(5),
-                'expire': match.group(6),
-                'minimum': match.group(7)
-            }
-        
-        # Parse different record types
-        self._parse_ns_records(content)
-        self._parse_a_records(content)
-        self._parse_aaaa_records(content)
-        self._parse_mx_records(content)
-        self._parse_txt_records(content)
-        self._parse_srv_records(content)
-        self._parse_cname_records(content)
-        self._parse_ptr_records(content)
+        # Flat [start0, end0, start1, end1, ...] aligned with self.records.
+        # Character offsets only equal byte offsets for ASCII files.
+        if self._ascii:
+            self.spans = [offset for key in self.PARSE_ORDER for offset in span_buckets[key]]
+        else:
+            self.spans = None
+            self.soa_span = None
         
         return {
             'ttl': self.ttl,
@@ -70,146 +66,231 @@ class DNSParser:
             'records': self.records
         }
     
+    def iter_records(self):
+        """
+        Yield records one at a time, in file order, while reading the zone
+        file in chunks. Nothing is accumulated in self.records; self.ttl and
+        self.soa are filled in as soon as they are encountered.
+        """
+        if not os.path.exists(self.zone_file_path):
+            raise FileNotFoundError(f"Zone file not found: {self.zone_file_path}")
+        
+        with open(self.zone_file_path, 'r', buffering=self.READ_CHUNK_SIZE, newline='') as f:
+            for _bucket, record, _start, _end in self._iter_parsed(f):
+                yield record
     
-    def _extract_comment(self, line):
-        """Extract inline comment from a record line"""
-        # Find comment after the record data (anything after ;)
-        if ';' in line:
-            parts = line.split(';', 1)
-            if len(parts) > 1:
-                return parts[1].strip()
-        return None
+    def _reset(self):
+        """Reset parser state before a new pass over the zone file"""
+        self.records = []
+        self.soa = None
+        self.ttl = None
+        self.origin = None
+        self._last_owner = None
+        self.spans = None
+        self.soa_span = None
+        self.inheritor_starts = set()
+        self.inline_directives = False
+        self._ascii = True
+    
+    def _iter_parsed(self, lines):
+        """
+        Single pass over the zone file lines.
+        Yields (bucket, record, start, end) tuples; $TTL, $ORIGIN and SOA are
+        stored on the parser. start/end are the offsets of the record's
+        statement; starts of statements directly followed by an indented
+        (owner-inheriting) statement are collected in self.inheritor_starts.
+        self.inline_directives is set when $TTL/$ORIGIN appears after the
+        first record, so text appended at the end would not be read against
+        the zone's own origin and TTL.
+        """
+        self._reset()
+        previous_start = None
+        
+        for inherited, tokens, comment, multiline, start, end in self._iter_statements(lines):
+            if not inherited and tokens[0].startswith('$'):
+                if previous_start is not None:
+                    self.inline_directives = True
+                self._handle_directive(tokens)
+                continue
+            
+            # Rewriting the previous statement with an explicit owner would
+            # change the owner this line inherits, indented or not
+            if inherited and previous_start is not None:
+                self.inheritor_starts.add(previous_start)
+            previous_start = start
+            
+            parsed = self._parse_statement(inherited, tokens, comment, multiline)
+            if parsed:
+                yield parsed[0], parsed[1], start, end
+            elif self.soa_span is None and self.soa is not None:
+                self.soa_span = (start, end)
     
-    def _parse_ns_records(self, content):
-        """Parse NS records"""
-        pattern = r'^(\S+)\s+IN\s+NS\s+(\S+)(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'NS',
-                'name': match.group(1),
-                'nameserver': match.group(2)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
-    
-    def _parse_a_records(self, content):
-        """Parse A records"""
-        pattern = r'^(\S+)\s+IN\s+A\s+(\d+\.\d+\.\d+\.\d+)(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'A',
-                'name': match.group(1),
-                'ipv4': match.group(2)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
-    
-    def _parse_aaaa_records(self, content):
-        """Parse AAAA records"""
-        pattern = r'^(\S+)\s+IN\s+AAAA\s+([0-9a-fA-F:]+)(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'AAAA',
-                'name': match.group(1),
-                'ipv6': match.group(2)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
-    
-    def _parse_mx_records(self, content):
-        """Parse MX records"""
-        pattern = r'^(\S+)\s+IN\s+MX\s+(\d+)\s+(\S+)(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'MX',
-                'name': match.group(1),
-                'priority': int(match.group(2)),
-                'mailserver': match.group(3)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
-    
-    def _parse_txt_records(self, content):
-        """Parse TXT records (including multi-line)"""
-        # Single-line TXT
-        pattern = r'^(\S+)\s+TXT\s+"([^"]+)"(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'TXT',
-                'name': match.group(1),
-                'text': match.group(2)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
-        
-        # Multi-line TXT (parentheses)
-        multi_pattern = r'^(\S+)\s+IN\s+TXT\s+\((.*?)\)'
-        for match in re.finditer(multi_pattern, content, re.DOTALL | re.MULTILINE):
-            name = match.group(1)
-            text_content = match.group(2)
-            # Extract all quoted strings and join them
-            text_parts = re.findall(r'"([^"]*)"', text_content)
-            combined_text = ''.join(text_parts)
-            self.records.append({
-                'type': 'TXT',
-                'name': name,
-                'text': combined_text
-            })
-    
-    def _parse_srv_records(self, content):
-        """Parse SRV records"""
-        pattern = r'^(\S+)\s+SRV\s+(\d+)\s+(\d+)\s+(\d+)\s+(\S+)(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'SRV',
-                'name': match.group(1),
-                'priority': int(match.group(2)),
-                'weight': int(match.group(3)),
-                'port': int(match.group(4)),
-                'target': match.group(5)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
-    
-    def _parse_cname_records(self, content):
-        """Parse CNAME records"""
-        pattern = r'^(\S+)\s+IN\s+CNAME\s+(\S+)(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'CNAME',
-                'name': match.group(1),
-                'target': match.group(2)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
-    
-    def _parse_ptr_records(self, content):
-        """Parse PTR records"""
-        pattern = r'^(\d+)\s+IN\s+PTR\s+(\S+)(.*)$'
-        for match in re.finditer(pattern, content, re.MULTILINE):
-            record = {
-                'type': 'PTR',
-                'ip_octet': match.group(1),
-                'fqdn': match.group(2)
-            }
-            comment = self._extract_comment(match.group(0))
-            if comment:
-                record['comment'] = comment
-            self.records.append(record)
+    def _iter_statements(self, lines):
+        """
+        Group physical lines into logical statements.
+        Handles parentheses spanning lines, quoted strings, comments and
+        owner-name inheritance (lines starting with whitespace).
+        """
+        depth = 0
+        tokens = []
+        comment = None
+        inherited = False
+        multiline = False
+        start = 0
+        pos = 0
+        
+        for line in lines:
+            line_start = pos
+            pos += len(line)
+            if self._ascii and not line.isascii():
+                self._ascii = False
+            
+            if depth == 0:
+                tokens = []
+                comment = None
+                inherited = line[:1] in (' ', '\t')
+                multiline = False
+                start = line_start
+            
+            # Fast path: plain lines need no regex tokenizer
+            code, sep, line_comment = line.partition(';')
+            if '"' in code or '(' in code or ')' in code:
+                line_comment = None
+                for tok in self._TOKEN_RE.findall(line):
+                    if tok == '(':
+                        depth += 1
+                        multiline = True
+                    elif tok == ')':
+                        depth = max(depth - 1, 0)
+                    elif tok[0] == ';':
+                        line_comment = tok[1:]
+                        break
+                    else:
+                        tokens.append(tok)
+            else:
+                tokens.extend(code.split())
+            
+            if comment is None and line_comment:
+                comment = line_comment.strip() or None
+            
+            if depth == 0 and tokens:
+                yield inherited, tokens, comment, multiline, start, pos
+        
+        # Unterminated parenthesis at end of file
+        if depth and tokens:
+            yield inherited, tokens, comment, multiline, start, pos
+    
+    def _handle_directive(self, tokens):
+        """Handle $TTL / $ORIGIN control entries"""
+        directive = tokens[0].upper()
+        if len(tokens) < 2:
+            return
+        if directive == '$TTL' and self.ttl is None:
+            self.ttl = tokens[1]
+        elif directive == '$ORIGIN':
+            self.origin = tokens[1]
+    
+    def _parse_statement(self, inherited, tokens, comment, multiline):
+        """Dispatch one logical statement on its record type"""
+        if inherited:
+            owner = self._last_owner
+            rest = tokens
+        else:
+            owner = tokens[0]
+            rest = tokens[1:]
+            self._last_owner = owner
+        
+        if owner is None:
+            return None
+        
+        # Optional TTL and class, in either order, before the type
+        ttl = None
+        i = 0
+        while i < len(rest):
+            token = rest[i]
+            if token.upper() in self.RECORD_CLASSES:
+                i += 1
+            elif ttl is None and self._TTL_RE.match(token):
+                ttl = token
+                i += 1
+            else:
+                break
+        
+        if i >= len(rest):
+            return None
+        
+        rtype = rest[i].upper()
+        rdata = rest[i + 1:]
+        
+        try:
+            if rtype == 'SOA':
+                if self.soa is None:
+                    self.soa = {
+                        'type': 'SOA',
+                        'primary_ns': rdata[0],
+                        'admin_email': rdata[1],
+                        'serial': rdata[2],
+                        'refresh': rdata[3],
+                        'retry': rdata[4],
+                        'expire': rdata[5],
+                        'minimum': rdata[6]
+                    }
+                return None
+            
+            bucket = rtype
+            if rtype == 'A':
+                record = {'type': 'A', 'name': owner, 'ipv4': rdata[0]}
+            elif rtype == 'AAAA':
+                record = {'type': 'AAAA', 'name': owner, 'ipv6': rdata[0]}
+            elif rtype == 'NS':
+                record = {'type': 'NS', 'name': owner, 'nameserver': rdata[0]}
+            elif rtype == 'CNAME':
+                record = {'type': 'CNAME', 'name': owner, 'target': rdata[0]}
+            elif rtype == 'PTR':
+                record = {'type': 'PTR', 'ip_octet': owner, 'fqdn': rdata[0]}
+            elif rtype == 'MX':
+                record = {
+                    'type': 'MX',
+                    'name': owner,
+                    'priority': int(rdata[0]),
+                    'mailserver': rdata[1]
+                }
+            elif rtype == 'SRV':
+                record = {
+                    'type': 'SRV',
+                    'name': owner,
+                    'priority': int(rdata[0]),
+                    'weight': int(rdata[1]),
+                    'port': int(rdata[2]),
+                    'target': rdata[3]
+                }
+            elif rtype == 'TXT':
+                if not rdata:
+                    return None
+                text = ''.join(self._unquote(part) for part in rdata)
+                record = {'type': 'TXT', 'name': owner, 'text': text}
+                if multiline:
+                    bucket = 'TXT_MULTI'
+            else:
+                # Unsupported record type
+                return None
+        except (IndexError, ValueError):
+            # Malformed record data
+            return None
+        
+        if ttl:
+            record['ttl'] = ttl
+        if comment:
+            record['comment'] = comment
+        
+        return bucket, record
+    
+    @staticmethod
+    def _unquote(token):
+        """Strip surrounding double quotes from a character-string token"""
+        if token.startswith('"'):
+            return token[1:-1] if len(token) > 1 and token.endswith('"') else token[1:]
+        return token
     
     @staticmethod
     def increment_serial(current_serial):
@@ -241,15 +322,16 @@ class DNSParser:
         """Format a record dictionary into zone file syntax"""
         rtype = record['type']
         comment_suffix = f" ; {record['comment']}" if record.get('comment') else ""
+        ttl_prefix = f"{record['ttl']} " if record.get('ttl') else ""
         
         if rtype == 'A':
-            return f"{record['name']:<15} IN A {record['ipv4']}{comment_suffix}"
+            return f"{record['name']:<15} {ttl_prefix}IN A {record['ipv4']}{comment_suffix}"
         
         elif rtype == 'AAAA':
-            return f"{record['name']:<15} IN AAAA {record['ipv6']}{comment_suffix}"
+            return f"{record['name']:<15} {ttl_prefix}IN AAAA {record['ipv6']}{comment_suffix}"
         
         elif rtype == 'MX':
-            return f"{record['name']:<15} IN MX {record['priority']} {record['mailserver']}{comment_suffix}"
+            return f"{record['name']:<15} {ttl_prefix}IN MX {record['priority']} {record['mailserver']}{comment_suffix}"
         
         elif rtype == 'TXT':
             # Handle long TXT records (split if needed)
@@ -259,21 +341,21 @@ class DNSParser:
                 parts = []
                 for i in range(0, len(text), 200):
                     parts.append(f'  "{text[i:i+200]}"')
-                return f"{record['name']} IN TXT (\n" + '\n'.join(parts) + "\n)"
+                return f"{record['name']} {ttl_prefix}IN TXT (\n" + '\n'.join(parts) + "\n)"
             else:
-                return f"{record['name']} TXT \"{text}\"{comment_suffix}"
+                return f"{record['name']} {ttl_prefix}TXT \"{text}\"{comment_suffix}"
         
         elif rtype == 'SRV':
-            return f"{record['name']} SRV {record['priority']} {record['weight']} {record['port']} {record['target']}{comment_suffix}"
+            return f"{record['name']} {ttl_prefix}SRV {record['priority']} {record['weight']} {record['port']} {record['target']}{comment_suffix}"
         
         elif rtype == 'CNAME':
-            return f"{record['name']:<15} IN CNAME {record['target']}{comment_suffix}"
+            return f"{record['name']:<15} {ttl_prefix}IN CNAME {record['target']}{comment_suffix}"
         
         elif rtype == 'PTR':
-            return f"{record['ip_octet']:<15} IN PTR {record['fqdn']}{comment_suffix}"
+            return f"{record['ip_octet']:<15} {ttl_prefix}IN PTR {record['fqdn']}{comment_suffix}"
         
         elif rtype == 'NS':
-            return f"{record['name']} IN NS {record['nameserver']}{comment_suffix}"
+            return f"{record['name']} {ttl_prefix}IN NS {record['nameserver']}{comment_suffix}"
         
         return ""
     
@@ -319,8 +401,261 @@ class DNSParser:
                     lines.append(self.format_record(record))
                 lines.append("")
         
-        # Write to file
-        with open(output_path, 'w') as f:
-            f.write('\n'.join(lines))
+        # Write to file (temp file + rename, readers never see a partial zone)
+        self.atomic_write(output_path, '\n'.join(lines))
         
         return True
+    
+    def layout(self):
+        """
+        Byte layout of the last parse, used by patch_zone_file: record spans
+        aligned with self.records, the SOA span, the starts of statements
+        whose owner the next line inherits and whether $TTL/$ORIGIN appear
+        between records. None if offsets are unusable (non-ASCII file).
+        """
+        if self.spans is None or self.soa_span is None:
+            return None
+        return {
+            'spans': self.spans,
+            'soa_span': self.soa_span,
+            'inheritor_starts': self.inheritor_starts,
+            'inline_directives': self.inline_directives
+        }
+    
+    def patch_zone_file(self, layout, identity, edits, new_serial):
+        """
+        Apply record edits by splicing only the affected statements and the
+        SOA serial into a copy of the existing file, instead of re-rendering
+        every record. Cost scales with the size of the change.
+        
+        layout:   layout() of the parse the edits were computed against
+        identity: (inode, mtime_ns, size) of the file at that parse
+        edits:    list of (position, old_record, new_record); position None
+                  appends new_record, new_record None deletes the record
+        
+        Returns False without writing when the edit cannot be done in place
+        (file changed, owner inheritance would break, $TTL/$ORIGIN between
+        records would apply to an appended line, unknown layout); the
+        caller should then fall back to write_zone_file.
+        """
+        if layout is None:
+            return False
+        
+        spans = layout['spans']
+        
+        with open(self.zone_file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if (st.st_ino, st.st_mtime_ns, st.st_size) != tuple(identity) or st.st_size == 0:
+                return False
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                splices = []
+                
+                for position, old_record, new_record in edits:
+                    if position is None:
+                        # A $ORIGIN/$TTL after the first record would apply to the appended line
+                        if layout.get('inline_directives'):
+                            return False
+                        # Append at end of file, terminating the last line if needed
+                        newline = self._line_ending(mm, len(mm)) or '\n'
+                        lead = '' if mm[len(mm) - 1:] == b'\n' else newline
+                        text = self.format_record(new_record)
+                        if not text:
+                            return False
+                        splices.append((len(mm), len(mm), lead + text.replace('\n', newline) + newline))
+                        continue
+                    
+                    start, end = spans[2 * position], spans[2 * position + 1]
+                    
+                    # Following lines inherit this owner: only same-owner replacements are safe
+                    if start in layout['inheritor_starts']:
+                        if new_record is None or self._owner(new_record) != self._owner(old_record):
+                            return False
+                    
+                    if new_record is None:
+                        splices.append((start, end, ''))
+                    else:
+                        text = self.format_record(new_record)
+                        if not text:
+                            return False
+                        newline = self._line_ending(mm, end)
+                        splices.append((start, end, text.replace('\n', newline or '\n') + newline))
+                
+                serial_span = self._serial_span(mm, layout['soa_span'])
+                if serial_span is None:
+                    return False
+                splices.append((serial_span[0], serial_span[1], str(new_serial)))
+                
+                splices.sort(key=lambda splice: (splice[0], splice[1]))
+                
+                chunks = []
+                pos = 0
+                for start, end, text in splices:
+                    if start < pos:
+                        # Overlapping edits
+                        return False
+                    chunks.append(mm[pos:start])
+                    chunks.append(text.encode('utf-8'))
+                    pos = end
+                chunks.append(mm[pos:])
+        
+        self.atomic_write(self.zone_file_path, chunks)
+        
+        return True
+    
+    @staticmethod
+    def _owner(record):
+        return record.get('ip_octet') if record.get('type') == 'PTR' else record.get('name')
+    
+    @staticmethod
+    def _line_ending(mm, end):
+        """Line ending used by the statement ending at offset end"""
+        if mm[max(end - 2, 0):end] == b'\r\n':
+            return '\r\n'
+        if mm[max(end - 1, 0):end] == b'\n':
+            return '\n'
+        return ''
+    
+    def _serial_span(self, mm, soa_span):
+        """Absolute offsets of the serial token inside the SOA statement"""
+        start, end = soa_span
+        text = mm[start:end].decode('ascii')
+        
+        tokens = [
+            match for match in self._TOKEN_RE.finditer(text)
+            if match.group(0)[0] not in ';()'
+        ]
+        for i, match in enumerate(tokens):
+            if match.group(0).upper() == 'SOA':
+                if i + 3 < len(tokens):
+                    serial = tokens[i + 3]
+                    return start + serial.start(), start + serial.end()
+                return None
+        return None
+    
+    @staticmethod
+    def atomic_write(path, content):
+        """
+        Replace path with content atomically: write a temp file in the same
+        directory, fsync it, copy the original mode/owner and rename it over
+        the original. The temp name does not end in a zone suffix, so the
+        watcher ignores it. content is a str or a list of bytes-like chunks.
+        """
+        if isinstance(content, str):
+            content = [content.encode('utf-8')]
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+        
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content:
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            try:
+                st = os.stat(path)
+                os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+                try:
+                    os.chown(tmp_path, st.st_uid, st.st_gid)
+                except PermissionError:
+                    pass
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+            
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class RecordIndex:
+    """
+    Hash index over a parsed zone's records, keyed on (type, owner, rdata).
+    Removed records are left as None placeholders so positions stay stable;
+    call compact() to get the final record list for writing.
+    """
+    
+    # Owner and rdata fields that identify a record of each type
+    KEY_FIELDS = {
+        'A': ('name', 'ipv4'),
+        'AAAA': ('name', 'ipv6'),
+        'NS': ('name', 'nameserver'),
+        'CNAME': ('name', 'target'),
+        'PTR': ('ip_octet', 'fqdn'),
+        'MX': ('name', 'priority', 'mailserver'),
+        'TXT': ('name', 'text'),
+        'SRV': ('name', 'priority', 'weight', 'port', 'target')
+    }
+    
+    def __init__(self, records):
+        self.records = records
+        self._positions = {}
+        for position, record in enumerate(records):
+            self._positions.setdefault(self.record_key(record), []).append(position)
+    
+    @classmethod
+    def record_key(cls, record):
+        """Return the (type, owner, rdata...) key of a record"""
+        rtype = record.get('type')
+        fields = cls.KEY_FIELDS.get(rtype)
+        if fields is None:
+            # Unknown type: fall back to every field except comment and ttl
+            return (rtype,) + tuple(sorted(
+                (k, str(v)) for k, v in record.items() if k not in ('type', 'comment', 'ttl')
+            ))
+        return (rtype,) + tuple(record.get(field) for field in fields)
+    
+    def contains(self, record):
+        """Check whether a record with the same type, owner and rdata exists"""
+        return bool(self._positions.get(self.record_key(record)))
+    
+    def find_all(self, record, match=None):
+        """
+        Return positions of records with the same key as `record`, in file order.
+        `match(existing, record)` can further filter candidates.
+        """
+        positions = self._positions.get(self.record_key(record), [])
+        if match is None:
+            return list(positions)
+        return [p for p in positions if match(self.records[p], record)]
+    
+    def add(self, record):
+        """Append a record and index it"""
+        self.records.append(record)
+        self._positions.setdefault(self.record_key(record), []).append(len(self.records) - 1)
+    
+    def replace(self, position, record):
+        """Replace the record at position, re-keying it"""
+        self._unlink(position)
+        self.records[position] = record
+        positions = self._positions.setdefault(self.record_key(record), [])
+        positions.append(position)
+        positions.sort()
+    
+    def remove(self, position):
+        """Remove the record at position (leaves a None placeholder)"""
+        self._unlink(position)
+        self.records[position] = None
+    
+    def _unlink(self, position):
+        key = self.record_key(self.records[position])
+        positions = self._positions[key]
+        positions.remove(position)
+        if not positions:
+            del self._positions[key]
+    
+    def compact(self):
+        """Return the records list without removed placeholders"""
+        return [record for record in self.records if record is not None]
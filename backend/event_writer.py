@@ -0,0 +1,268 @@
+import fcntl
+import os
+import queue
+import threading
+import time
+from bson import json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+from config import config
+
+# Duplicate key: the document was already stored (e.g. replayed twice)
+DUPLICATE_KEY_ERROR = 11000
+
+
+class EventWriter:
+    """
+    Buffered, batched writer for audit events.
+    write() only puts the document on an in-process queue; a background
+    thread sends queued documents with one insert_many per batch, whenever
+    EVENT_BATCH_SIZE documents are waiting or EVENT_FLUSH_INTERVAL seconds
+    have passed. When the queue is full, write() waits up to
+    EVENT_ENQUEUE_TIMEOUT seconds (back-pressure) before spilling.
+    
+    Batches that cannot reach MongoDB are appended to a local spill file
+    (EVENT_SPILL_PATH, JSON lines) and replayed after the next successful
+    write, so a database outage does not lose audit history.
+    """
+    
+    # Seconds between attempts to replay the spill file while idle
+    REPLAY_INTERVAL = 30
+    
+    def __init__(self, insert_many, batch_size=None, flush_interval=None,
+                 queue_size=None, enqueue_timeout=None, spill_path=None, on_written=None):
+        self._insert_many = insert_many
+        self._on_written = on_written
+        self.batch_size = batch_size or config.EVENT_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else config.EVENT_FLUSH_INTERVAL
+        self.queue_size = queue_size or config.EVENT_QUEUE_SIZE
+        self.enqueue_timeout = enqueue_timeout if enqueue_timeout is not None else config.EVENT_ENQUEUE_TIMEOUT
+        self.spill_path = spill_path if spill_path is not None else config.EVENT_SPILL_PATH
+        self._reset_state()
+    
+    def _reset_state(self):
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        # Guards thread start-up and the counters below, which request threads
+        # and the flusher thread both update
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._next_replay = 0.0
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.callback_errors = 0
+        self.max_queue_depth = 0
+        self.last_error = None
+    
+    def _after_fork(self):
+        # The flusher thread stays with the parent; a child starts its own
+        self._reset_state()
+    
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None and not self._stopping:
+                    self._thread = threading.Thread(target=self._run, name='event-writer', daemon=True)
+                    self._thread.start()
+    
+    def write(self, document):
+        """Queue a document for insertion; returns without waiting for MongoDB"""
+        self._ensure_thread()
+        
+        try:
+            self._queue.put_nowait(document)
+        except queue.Full:
+            with self._lock:
+                self.blocked += 1
+            try:
+                self._queue.put(document, timeout=self.enqueue_timeout)
+            except queue.Full:
+                self._spill([document])
+                return
+        
+        depth = self._queue.qsize()
+        with self._lock:
+            self.enqueued += 1
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+    
+    def _collect(self):
+        """Wait for the first document, then gather a batch until size or time runs out"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while not self._stopping:
+            batch = self._collect()
+            if batch and self._send(batch):
+                self._replay_spill()
+            elif not batch and time.monotonic() >= self._next_replay:
+                self._replay_spill()
+    
+    def _send(self, batch):
+        """insert_many one batch; spill it if MongoDB is unreachable"""
+        try:
+            self._insert_many(batch)
+        except BulkWriteError as e:
+            # Rejected documents (validation, duplicates) must not be retried
+            errors = e.details.get('writeErrors', [])
+            rejected = [err for err in errors if err.get('code') != DUPLICATE_KEY_ERROR]
+            with self._lock:
+                self.rejected += len(rejected)
+                self.written += len(batch) - len(errors)
+                self.batches += 1
+                if rejected:
+                    self.last_error = rejected[0].get('errmsg')
+            if rejected:
+                print(f"Event log: {len(rejected)} event(s) rejected: {self.last_error}")
+            failed = {err.get('index') for err in errors}
+            self._notify([doc for i, doc in enumerate(batch) if i not in failed])
+            return True
+        except PyMongoError as e:
+            # Replay again only after a successful write or a long pause
+            self._next_replay = time.monotonic() + self.REPLAY_INTERVAL
+            with self._lock:
+                self.last_error = str(e)
+            print(f"Event log write failed, spilling {len(batch)} event(s): {e}")
+            self._spill(batch)
+            return False
+        
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+        self._notify(batch)
+        return True
+    
+    def _notify(self, documents):
+        """Pass newly stored documents to on_written (e.g. rollup maintenance)"""
+        if self._on_written is None or not documents:
+            return
+        try:
+            self._on_written(documents)
+        except Exception as e:
+            with self._lock:
+                self.callback_errors += 1
+            print(f"Event log post-write hook failed: {e}")
+    
+    def _spill(self, documents):
+        """Append documents to the local spill file (or drop them if none is configured)"""
+        if not self.spill_path:
+            with self._lock:
+                self.dropped += len(documents)
+            return
+        
+        data = ''.join(json_util.dumps(doc) + '\n' for doc in documents)
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            while True:
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    # The file may have been claimed for replay while we waited
+                    try:
+                        if os.stat(self.spill_path).st_ino != os.fstat(f.fileno()).st_ino:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    f.write(data)
+                    f.flush()
+                    break
+            with self._lock:
+                self.spilled += len(documents)
+        except OSError as e:
+            with self._lock:
+                self.dropped += len(documents)
+            print(f"Event log spill failed, dropped {len(documents)} event(s): {e}")
+    
+    def _replay_spill(self):
+        """Send spilled events back to MongoDB; one process claims the file at a time"""
+        self._next_replay = time.monotonic() + self.REPLAY_INTERVAL
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        
+        claimed = f"{self.spill_path}.{os.getpid()}.replay"
+        try:
+            os.rename(self.spill_path, claimed)
+        except OSError:
+            return
+        
+        try:
+            with open(claimed, 'r', encoding='utf-8') as f:
+                # Wait for any writer that opened the file before it was renamed
+                fcntl.flock(f, fcntl.LOCK_EX)
+                documents = [json_util.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            print(f"Event log spill replay failed: {e}")
+            return
+        
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            if not self._send(batch):
+                # _send spilled this batch again; put the rest back too
+                self._spill(documents[start + self.batch_size:])
+                break
+            with self._lock:
+                self.replayed += len(batch)
+        
+        os.unlink(claimed)
+    
+    def flush(self):
+        """Synchronously write everything queued so far (used at shutdown)"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._send(batch)
+    
+    def close(self, timeout=5.0):
+        """Stop the background thread and flush what is left"""
+        self._stopping = True
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'queue_size': self.queue_size,
+                'max_queue_depth': self.max_queue_depth,
+                'batch_size': self.batch_size,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'blocked': self.blocked,
+                'spilled': self.spilled,
+                'replayed': self.replayed,
+                'rejected': self.rejected,
+                'dropped': self.dropped,
+                'callback_errors': self.callback_errors,
+                'last_error': self.last_error
+            }
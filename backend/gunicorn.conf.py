@@ -0,0 +1,58 @@
+"""
+Gunicorn settings for the DNS Manager API.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Each worker is a separate process with its own thread pool, so slow requests
+(rndc reloads, large zone saves) no longer block everything else the way the
+single-process development server does. Tune with the WEB_* variables in .env.
+"""
+# Imported under another name: 'config' is itself a gunicorn setting
+from config import config as app_config
+
+bind = f"0.0.0.0:{app_config.FLASK_PORT}"
+
+# Processes x threads; gthread workers keep idle keep-alive connections cheap
+workers = app_config.WEB_WORKERS
+worker_class = 'gthread'
+threads = app_config.WEB_THREADS
+keepalive = app_config.WEB_KEEPALIVE
+
+# Reloads retry rndc up to MAX_RELOAD_ATTEMPTS times, so allow long requests
+timeout = app_config.WEB_TIMEOUT
+graceful_timeout = app_config.WEB_GRACEFUL_TIMEOUT
+
+# Import the app once in the master and fork workers from it. Connections and
+# locks are re-created in each child (see mongo.py, zone_cache.py).
+# With preload, HUP respawns workers gracefully but does not pick up new code;
+# restart the service after an upgrade.
+preload_app = True
+
+# Recycle workers now and then to bound memory growth of the zone cache
+max_requests = app_config.WEB_MAX_REQUESTS
+max_requests_jitter = max(1, app_config.WEB_MAX_REQUESTS // 10)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+proc_name = 'dns-manager'
+
+
+def post_fork(server, worker):
+    """
+    Create/update MongoDB indexes (including the event log TTL) in the first
+    worker only. Doing it at import time would run it in the master and open
+    a MongoDB client there before forking. It runs in the background so an
+    unreachable database does not hold up the worker.
+    """
+    if worker.age == 1:
+        from models import ensure_indexes_in_background
+        ensure_indexes_in_background()
+
+
+def worker_exit(server, worker):
+    """Flush queued audit events and close the MongoDB pool before a worker goes away"""
+    from models import event_writer
+    from mongo import mongo
+    event_writer.close()
+    mongo.close()
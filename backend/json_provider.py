@@ -0,0 +1,67 @@
+import json
+from datetime import date, datetime
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Naive datetimes from MongoDB are UTC: "2024-01-01T12:00:00Z"
+    ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+def default(obj):
+    """Serialize the MongoDB / Python types that plain JSON lacks"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            return obj.isoformat() + 'Z'
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj):
+    """Compact UTF-8 JSON, using orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. non-string dict keys or integers beyond 64 bits
+            pass
+    return json.dumps(obj, default=default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dumps(obj):
+    """Same as dumps_bytes, as a str"""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson (stdlib json when unavailable).
+    ObjectId and datetime values are serialized directly, so routes can
+    return MongoDB documents without converting them first.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj)
+    
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
@@ -1,15 +1,39 @@
-from pymongo import MongoClient
-from datetime import datetime
+import atexit
+import os
+import threading
+import time
+from pymongo import UpdateOne
+from bson import ObjectId
+from datetime import datetime, timedelta
 import bcrypt
 from config import config
+from event_writer import EventWriter
+from mongo import mongo, LazyCollection
 
-# MongoDB connection
-client = MongoClient(config.MONGO_URI)
-db = client.dns_manager
+# Collection handles resolve through the per-process client on first use,
+# so importing this module (dns_operations, the watcher, CLI tools) does not
+# connect to MongoDB and forked workers never share the parent's sockets
+users_collection = LazyCollection(mongo, 'users')
+event_logs_collection = LazyCollection(mongo, 'event_logs')
+revoked_tokens_collection = LazyCollection(mongo, 'revoked_tokens')
+event_rollups_collection = LazyCollection(mongo, 'event_rollups')
 
-# Collections
-users_collection = db.users
-event_logs_collection = db.event_logs
+
+def _insert_event_logs(documents):
+    event_logs_collection.insert_many(documents, ordered=False)
+
+
+def _update_event_rollups(documents):
+    EventRollup.apply(documents)
+
+
+# Audit events are queued and inserted in batches off the request path;
+# each stored batch is also folded into the hourly analytics rollups
+event_writer = EventWriter(_insert_event_logs, on_written=_update_event_rollups)
+atexit.register(event_writer.close)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=event_writer._after_fork)
 
 
 class User:
@@ -25,7 +49,7 @@ class User:
     @staticmethod
     def create(username, password, role='user'):
         """Create a new user with hashed password"""
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=config.BCRYPT_ROUNDS))
         
         user_data = {
             'username': username,
@@ -65,6 +89,14 @@ class User:
             {'$set': {'last_login': datetime.utcnow()}}
         )
     
+    @staticmethod
+    def update_password_hash(username, password_hash):
+        """Replace a stored password hash (e.g. after a bcrypt cost change)"""
+        users_collection.update_one(
+            {'username': username},
+            {'$set': {'password_hash': password_hash}}
+        )
+    
     @staticmethod
     def list_all():
         """List all users (without password hashes)"""
@@ -81,10 +113,102 @@ class User:
 class EventLog:
     """Event log model for audit trail"""
     
+    # Newest-first listing, optionally filtered on one field. _id breaks ties
+    # between events with the same timestamp.
+    INDEXES = [
+        [('timestamp', -1), ('_id', -1)],
+        [('user', 1), ('timestamp', -1), ('_id', -1)],
+        [('action', 1), ('timestamp', -1), ('_id', -1)],
+        [('zone', 1), ('timestamp', -1), ('_id', -1)]
+    ]
+    # Created by older init-mongo.js versions; prefixes of the indexes above
+    SUPERSEDED_INDEXES = ['timestamp_-1', 'user_1_timestamp_-1', 'action_1_timestamp_-1']
+    TTL_INDEX = 'timestamp_1'
+    
+    # Every action passed to EventLog.create(); MongoDB rejects any other
+    ACTIONS = [
+        'login', 'logout',
+        'add_record', 'update_record', 'delete_record', 'batch_records',
+        'reload_zone', 'restart_service', 'sync_slave', 'create_zone',
+        'create_user', 'delete_user'
+    ]
+    # Same schema as init-mongo.js; applied to existing databases at startup
+    VALIDATOR = {
+        '$jsonSchema': {
+            'bsonType': 'object',
+            'required': ['timestamp', 'user', 'action', 'status'],
+            'properties': {
+                'timestamp': {'bsonType': 'date', 'description': 'Event timestamp'},
+                'user': {'bsonType': 'string', 'description': 'Username who performed the action'},
+                'action': {'enum': ACTIONS, 'description': 'Type of action performed'},
+                'zone': {'bsonType': 'string', 'description': 'DNS zone name (optional for some actions)'},
+                'record_type': {'bsonType': 'string', 'description': 'DNS record type (A, AAAA, MX, etc.)'},
+                'details': {'bsonType': 'object', 'description': 'Additional details about the action'},
+                'status': {'enum': ['success', 'failure'], 'description': 'Whether the action succeeded or failed'},
+                'error_message': {'bsonType': 'string', 'description': 'Error message if status is failure'}
+            }
+        }
+    }
+    
+    @staticmethod
+    def update_validator():
+        """
+        Replace the event_logs validator created by an older init-mongo.js,
+        whose action enum rejected events such as batch_records (error 121)
+        """
+        try:
+            if 'event_logs' not in mongo.db.list_collection_names(filter={'name': 'event_logs'}):
+                return True
+            options = event_logs_collection.options()
+            if options.get('validator') == EventLog.VALIDATOR:
+                return True
+            mongo.db.command('collMod', 'event_logs', validator=EventLog.VALIDATOR)
+            print("Updated event_logs validator")
+            return True
+        except Exception as e:
+            print(f"Validator update error: {e}")
+            return False
+    
     @staticmethod
-    def create(user, action, status, zone=None, record_type=None, details=None, error_message=None):
-        """Create a new event log entry"""
+    def create_indexes(retention_days=None):
+        """
+        Create the query indexes and the retention TTL index.
+        Events older than retention_days (EVENT_LOG_RETENTION_DAYS) are removed
+        by MongoDB; 0 keeps them forever. Changing the retention rebuilds the
+        TTL index.
+        """
+        if retention_days is None:
+            retention_days = config.EVENT_LOG_RETENTION_DAYS
+        
+        try:
+            for keys in EventLog.INDEXES:
+                event_logs_collection.create_index(keys)
+            
+            existing = event_logs_collection.index_information()
+            for name in EventLog.SUPERSEDED_INDEXES:
+                if name in existing:
+                    event_logs_collection.drop_index(name)
+            
+            ttl_seconds = int(retention_days * 86400) if retention_days > 0 else None
+            ttl_index = existing.get(EventLog.TTL_INDEX)
+            if ttl_index is not None and ttl_index.get('expireAfterSeconds') != ttl_seconds:
+                event_logs_collection.drop_index(EventLog.TTL_INDEX)
+                ttl_index = None
+            if ttl_index is None and ttl_seconds:
+                event_logs_collection.create_index(
+                    [('timestamp', 1)], name=EventLog.TTL_INDEX, expireAfterSeconds=ttl_seconds
+                )
+            return True
+        except Exception as e:
+            print(f"Index creation error: {e}")
+            return False
+    
+    @staticmethod
+    def create(user, action, status, zone=None, record_type=None, details=None, error_message=None,
+               duration_ms=None):
+        """Queue a new event log entry (written in the background by event_writer)"""
         log_data = {
+            '_id': ObjectId(),
             'timestamp': datetime.utcnow(),
             'user': user,
             'action': action,
@@ -99,12 +223,11 @@ class EventLog:
             log_data['details'] = details
         if error_message:
             log_data['error_message'] = error_message
+        if duration_ms is not None:
+            log_data['duration_ms'] = round(duration_ms, 1)
         
-        try:
-            result = event_logs_collection.insert_one(log_data)
-            return {'success': True, 'log_id': str(result.inserted_id)}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        event_writer.write(log_data)
+        return {'success': True, 'log_id': str(log_data['_id'])}
     
     @staticmethod
     def find_recent(limit=100, user=None, action=None):
@@ -115,18 +238,307 @@ class EventLog:
         if action:
             query['action'] = action
         
-        logs = event_logs_collection.find(query).sort('timestamp', -1).limit(limit)
+        logs = event_logs_collection.find(query).sort([('timestamp', -1), ('_id', -1)]).limit(limit)
         return list(logs)
     
+    @staticmethod
+    def find_page(limit=100, user=None, action=None, zone=None, since=None, until=None,
+                  before=None, fields=None):
+        """
+        One newest-first page of event logs using keyset pagination.
+        before is the (timestamp, _id) of the last event of the previous page;
+        the query seeks straight to it through the (filter, timestamp, _id)
+        indexes instead of skipping over earlier pages. fields limits the
+        returned fields (_id and timestamp are always included).
+        Returns (logs, has_more).
+        """
+        query = {}
+        if user:
+            query['user'] = user
+        if action:
+            query['action'] = action
+        if zone:
+            query['zone'] = zone
+        
+        if since or until:
+            query['timestamp'] = {}
+            if since:
+                query['timestamp']['$gte'] = since
+            if until:
+                query['timestamp']['$lt'] = until
+        
+        if before:
+            timestamp, log_id = before
+            # The $lte bound lets the index scan start at the cursor position
+            query.setdefault('timestamp', {})['$lte'] = timestamp
+            query['$or'] = [
+                {'timestamp': {'$lt': timestamp}},
+                {'timestamp': timestamp, '_id': {'$lt': log_id}}
+            ]
+        
+        projection = None
+        if fields:
+            projection = {field: 1 for field in fields}
+            projection['timestamp'] = 1
+        
+        cursor = event_logs_collection.find(query, projection)
+        logs = list(cursor.sort([('timestamp', -1), ('_id', -1)]).limit(limit + 1))
+        return logs[:limit], len(logs) > limit
+    
     @staticmethod
     def find_by_zone(zone, limit=50):
         """Find event logs for a specific zone"""
-        logs = event_logs_collection.find({'zone': zone}).sort('timestamp', -1).limit(limit)
+        logs = event_logs_collection.find({'zone': zone}).sort([('timestamp', -1), ('_id', -1)]).limit(limit)
         return list(logs)
     
     @staticmethod
-    def delete_old(days=90):
-        """Delete event logs older than specified days"""
+    def delete_old(days=90, batch_size=10000):
+        """
+        Delete event logs older than specified days.
+        Works oldest-first in batches of batch_size so a large backlog does not
+        turn into one long-running delete. Returns the number deleted.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        result = event_logs_collection.delete_many({'timestamp': {'$lt': cutoff_date}})
-        return result.deleted_count
+        deleted = 0
+        
+        while True:
+            ids = [doc['_id'] for doc in event_logs_collection.find(
+                {'timestamp': {'$lt': cutoff_date}}, {'_id': 1}
+            ).sort('timestamp', 1).limit(batch_size)]
+            if not ids:
+                return deleted
+            
+            result = event_logs_collection.delete_many({'_id': {'$in': ids}})
+            deleted += result.deleted_count
+    
+    @staticmethod
+    def retention_status():
+        """Configured retention, the TTL index actually in place and the oldest event"""
+        try:
+            ttl_index = event_logs_collection.index_information().get(EventLog.TTL_INDEX) or {}
+            oldest = event_logs_collection.find_one({}, {'timestamp': 1}, sort=[('timestamp', 1)])
+            return {
+                'success': True,
+                'retention_days': config.EVENT_LOG_RETENTION_DAYS,
+                'ttl_seconds': ttl_index.get('expireAfterSeconds'),
+                'oldest_event': oldest['timestamp'] if oldest else None,
+                'estimated_count': event_logs_collection.estimated_document_count()
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+
+class EventRollup:
+    """
+    Hourly event counts per (action, status, user, zone), maintained with
+    $inc upserts as event batches are stored, so analytics never have to
+    aggregate the raw event_logs collection.
+    """
+    
+    DIMENSIONS = ('action', 'status', 'user', 'zone')
+    BUCKETS = ('hour', 'day', 'total')
+    
+    @staticmethod
+    def create_indexes():
+        """One document per hour and dimension combination"""
+        try:
+            event_rollups_collection.create_index(
+                [('hour', 1), ('action', 1), ('status', 1), ('user', 1), ('zone', 1)],
+                unique=True
+            )
+            return True
+        except Exception as e:
+            print(f"Index creation error: {e}")
+            return False
+    
+    @staticmethod
+    def _hour(timestamp):
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    
+    @staticmethod
+    def apply(documents):
+        """Fold a batch of stored events into the rollups (one bulk write)"""
+        increments = {}
+        for doc in documents:
+            key = (EventRollup._hour(doc['timestamp']),) + tuple(doc.get(d) for d in EventRollup.DIMENSIONS)
+            entry = increments.get(key)
+            if entry is None:
+                entry = increments[key] = {'count': 0, 'duration_count': 0, 'duration_total_ms': 0.0, 'duration_max_ms': None}
+            entry['count'] += 1
+            duration = doc.get('duration_ms')
+            if duration is not None:
+                entry['duration_count'] += 1
+                entry['duration_total_ms'] += duration
+                if entry['duration_max_ms'] is None or duration > entry['duration_max_ms']:
+                    entry['duration_max_ms'] = duration
+        
+        if not increments:
+            return 0
+        
+        operations = []
+        for key, entry in increments.items():
+            update = {'$inc': {
+                'count': entry['count'],
+                'duration_count': entry['duration_count'],
+                'duration_total_ms': entry['duration_total_ms']
+            }}
+            if entry['duration_max_ms'] is not None:
+                update['$max'] = {'duration_max_ms': entry['duration_max_ms']}
+            operations.append(UpdateOne(dict(zip(('hour',) + EventRollup.DIMENSIONS, key)), update, upsert=True))
+        
+        event_rollups_collection.bulk_write(operations, ordered=False)
+        return len(operations)
+    
+    @staticmethod
+    def rebuild(since=None, batch_size=5000):
+        """
+        Recompute rollups from event_logs (one-off backfill, e.g. for events
+        stored before rollups existed). Hours from since onwards are replaced.
+        """
+        query = {}
+        if since:
+            query['timestamp'] = {'$gte': EventRollup._hour(since)}
+        event_rollups_collection.delete_many({'hour': {'$gte': EventRollup._hour(since)}} if since else {})
+        
+        projection = {'_id': 0, 'timestamp': 1, 'duration_ms': 1}
+        projection.update({d: 1 for d in EventRollup.DIMENSIONS})
+        
+        batch = []
+        total = 0
+        for doc in event_logs_collection.find(query, projection):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                EventRollup.apply(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            EventRollup.apply(batch)
+            total += len(batch)
+        return total
+    
+    @staticmethod
+    def query(group_by=(), bucket='day', since=None, until=None, filters=None):
+        """
+        Counts, failures and durations grouped by any of DIMENSIONS and a
+        time bucket ('hour', 'day' or 'total'), read from the hourly rollups.
+        """
+        query = {d: v for d, v in (filters or {}).items() if v is not None}
+        if since or until:
+            query['hour'] = {}
+            if since:
+                query['hour']['$gte'] = EventRollup._hour(since)
+            if until:
+                query['hour']['$lt'] = until
+        
+        groups = {}
+        for doc in event_rollups_collection.find(query, {'_id': 0}):
+            if bucket == 'hour':
+                period = doc['hour']
+            elif bucket == 'day':
+                period = doc['hour'].replace(hour=0)
+            else:
+                period = None
+            
+            key = (period,) + tuple(doc.get(d) for d in group_by)
+            row = groups.get(key)
+            if row is None:
+                row = groups[key] = {'count': 0, 'failures': 0, 'duration_count': 0,
+                                     'duration_total_ms': 0.0, 'duration_max_ms': None}
+                if period is not None:
+                    row['bucket'] = period
+                for d, value in zip(group_by, key[1:]):
+                    row[d] = value
+            
+            row['count'] += doc.get('count', 0)
+            if doc.get('status') == 'failure':
+                row['failures'] += doc.get('count', 0)
+            row['duration_count'] += doc.get('duration_count', 0)
+            row['duration_total_ms'] += doc.get('duration_total_ms', 0.0)
+            if doc.get('duration_max_ms') is not None and (
+                    row['duration_max_ms'] is None or doc['duration_max_ms'] > row['duration_max_ms']):
+                row['duration_max_ms'] = doc['duration_max_ms']
+        
+        rows = []
+        for key in sorted(groups, key=lambda k: tuple('' if v is None else v for v in k)):
+            row = groups[key]
+            row['failure_rate'] = round(row['failures'] / row['count'], 4) if row['count'] else None
+            row['duration_avg_ms'] = round(row['duration_total_ms'] / row['duration_count'], 1) if row['duration_count'] else None
+            del row['duration_total_ms']
+            rows.append(row)
+        return rows
+
+
+class RevokedToken:
+    """Deny-list of logged-out token IDs (jti), kept until the token expires"""
+    
+    @staticmethod
+    def create_indexes():
+        """Unique jti, TTL on the token expiry and an index for incremental reads"""
+        try:
+            revoked_tokens_collection.create_index('jti', unique=True)
+            revoked_tokens_collection.create_index('expires_at', expireAfterSeconds=0)
+            revoked_tokens_collection.create_index('revoked_at')
+            return True
+        except Exception as e:
+            print(f"Index creation error: {e}")
+            return False
+    
+    @staticmethod
+    def revoke(jti, username, expires_at):
+        """Add a token ID to the deny-list"""
+        try:
+            revoked_tokens_collection.update_one(
+                {'jti': jti},
+                {'$setOnInsert': {
+                    'jti': jti,
+                    'user': username,
+                    'expires_at': expires_at,
+                    'revoked_at': datetime.utcnow()
+                }},
+                upsert=True
+            )
+            return {'success': True}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def find_since(since=None):
+        """Unexpired revocations, optionally only those recorded after since"""
+        query = {'expires_at': {'$gt': datetime.utcnow()}}
+        if since:
+            query['revoked_at'] = {'$gt': since}
+        
+        projection = {'_id': 0, 'jti': 1, 'expires_at': 1, 'revoked_at': 1}
+        return list(revoked_tokens_collection.find(query, projection).sort('revoked_at', 1))
+
+
+def ensure_indexes():
+    """Create or update the indexes of every collection (run once at startup)"""
+    try:
+        mongo.ping()
+    except Exception as e:
+        print(f"MongoDB unavailable, skipping index creation: {e}")
+        return False
+    
+    User.create_indexes()
+    EventLog.create_indexes()
+    EventLog.update_validator()
+    EventRollup.create_indexes()
+    RevokedToken.create_indexes()
+    return True
+
+
+def ensure_indexes_in_background(retry_interval=None):
+    """
+    Run ensure_indexes() on a daemon thread, retrying while MongoDB is
+    unreachable, so a slow or down database does not hold up startup
+    """
+    retry_interval = retry_interval if retry_interval is not None else config.MONGO_INDEX_RETRY_SECONDS
+    
+    def run():
+        while not ensure_indexes():
+            time.sleep(retry_interval)
+    
+    thread = threading.Thread(target=run, name='ensure-indexes', daemon=True)
+    thread.start()
+    return thread
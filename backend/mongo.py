@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+from config import config
+
+
+class PoolStats(ConnectionPoolListener):
+    """Connection pool counters collected from PyMongo's CMAP events"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting_since = {}
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.max_wait_ms = 0.0
+        self.wait_seconds = 0.0
+        self.cleared = 0
+        self.last_failure = None
+    
+    def connection_check_out_started(self, event):
+        # Events for one checkout are published on the requesting thread
+        self._waiting_since[threading.get_ident()] = time.monotonic()
+    
+    def _waited(self):
+        started = self._waiting_since.pop(threading.get_ident(), None)
+        return time.monotonic() - started if started is not None else 0.0
+    
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_seconds += waited
+            self.max_wait_ms = max(self.max_wait_ms, waited * 1000)
+    
+    def connection_check_out_failed(self, event):
+        self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+            self.last_failure = event.reason
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+            self.open += 1
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+            self.open -= 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.cleared += 1
+    
+    def pool_closed(self, event):
+        pass
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'open': self.open,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'created': self.created,
+                'closed': self.closed,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'avg_wait_ms': round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else None,
+                'max_wait_ms': round(self.max_wait_ms, 3),
+                'cleared': self.cleared,
+                'last_failure': self.last_failure
+            }
+
+
+class MongoConnection:
+    """
+    Per-process MongoDB client, created on first use.
+    Importing models no longer opens a connection, and a process that
+    inherits the object across fork (pre-forked server workers, the
+    watcher's children) builds its own client instead of sharing the
+    parent's sockets and monitor threads.
+    """
+    
+    def __init__(self, uri=None, database='dns_manager'):
+        self.uri = uri or config.MONGO_URI
+        self.database_name = database
+        self.options = {
+            'maxPoolSize': config.MONGO_MAX_POOL_SIZE,
+            'minPoolSize': config.MONGO_MIN_POOL_SIZE,
+            'maxIdleTimeMS': config.MONGO_MAX_IDLE_TIME_MS,
+            'waitQueueTimeoutMS': config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            'connectTimeoutMS': config.MONGO_CONNECT_TIMEOUT_MS,
+            'serverSelectionTimeoutMS': config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            'socketTimeoutMS': config.MONGO_SOCKET_TIMEOUT_MS
+        }
+        self._lock = threading.Lock()
+        self._client = None
+        self._pid = None
+        self._pool_stats = PoolStats()
+    
+    def _after_fork(self):
+        # Leave the parent's client alone (closing it here would touch the
+        # parent's sockets); the next access creates one for this process
+        self._lock = threading.Lock()
+        self._client = None
+        self._pid = None
+        self._pool_stats = PoolStats()
+    
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._pool_stats = PoolStats()
+                    # connect=False: no background connection until the first operation
+                    self._client = MongoClient(
+                        self.uri,
+                        connect=False,
+                        event_listeners=[self._pool_stats],
+                        **self.options
+                    )
+                    self._pid = os.getpid()
+        return self._client
+    
+    @property
+    def db(self):
+        return self.client[self.database_name]
+    
+    def ping(self):
+        """Raise if MongoDB cannot be reached within the server selection timeout"""
+        self.client.admin.command('ping')
+    
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+    
+    def stats(self):
+        return {
+            'initialized': self._client is not None and self._pid == os.getpid(),
+            'pid': os.getpid(),
+            'max_pool_size': self.options['maxPoolSize'],
+            'min_pool_size': self.options['minPoolSize'],
+            'max_idle_time_ms': self.options['maxIdleTimeMS'],
+            'wait_queue_timeout_ms': self.options['waitQueueTimeoutMS'],
+            'pool': self._pool_stats.stats()
+        }
+
+
+class LazyCollection:
+    """
+    Stand-in for a pymongo Collection that resolves it through the
+    per-process client on every use, so module-level handles stay valid
+    across fork and never connect at import time.
+    """
+    
+    def __init__(self, connection, name):
+        self._connection = connection
+        self._name = name
+        self._client = None
+        self._collection = None
+    
+    def _resolve(self):
+        client = self._connection.client
+        if client is not self._client:
+            self._collection = client[self._connection.database_name][self._name]
+            self._client = client
+        return self._collection
+    
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+    
+    def __repr__(self):
+        return f"LazyCollection({self._name!r})"
+
+
+mongo = MongoConnection()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=mongo._after_fork)
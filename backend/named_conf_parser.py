@@ -1,14 +1,60 @@
 import re
 import os
+import threading
 from config import config
 
 
 class NamedConfParser:
     """Parser for BIND named.conf configuration file"""
     
+    # Shared parse results: conf_path -> (file identity, parser)
+    _cache = {}
+    _cache_lock = threading.Lock()
+    
     def __init__(self, conf_path=None):
         self.conf_path = conf_path or config.NAMED_CONF_PATH
         self.zones = []
+        self.zones_by_name = {}
+        self.zones_by_file = {}
+    
+    @classmethod
+    def cached(cls, conf_path=None):
+        """
+        Return a parsed NamedConfParser shared across requests.
+        named.conf is only re-parsed when its inode, mtime or size changes.
+        The returned parser must be treated as read-only.
+        """
+        conf_path = conf_path or config.NAMED_CONF_PATH
+        
+        try:
+            st = os.stat(conf_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"named.conf not found: {conf_path}")
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        
+        with cls._cache_lock:
+            entry = cls._cache.get(conf_path)
+            if entry and entry[0] == identity:
+                return entry[1]
+        
+        parser = cls(conf_path)
+        parser.parse()
+        
+        with cls._cache_lock:
+            cls._cache[conf_path] = (identity, parser)
+        
+        return parser
+    
+    @classmethod
+    def _after_fork(cls):
+        """Re-create the cache lock in a forked worker"""
+        cls._cache_lock = threading.Lock()
+    
+    @classmethod
+    def invalidate_cache(cls, conf_path=None):
+        """Drop the shared parse result for conf_path"""
+        with cls._cache_lock:
+            cls._cache.pop(conf_path or config.NAMED_CONF_PATH, None)
     
     def parse(self):
         """Parse named.conf and extract zone definitions"""
@@ -23,6 +69,8 @@ class NamedConfParser:
         content = re.sub(r'//.*?$', '', content, flags=re.MULTILINE)
         
         self.zones = []
+        self.zones_by_name = {}
+        self.zones_by_file = {}
         
         # Match zone blocks: zone "name" { ... }
         zone_pattern = r'zone\s+"([^"]+)"\s+(?:IN\s+)?\{([^}]+)\}'
@@ -37,6 +85,10 @@ class NamedConfParser:
             # Only include master zones
             if zone_info and zone_info.get('type') == 'master':
                 self.zones.append(zone_info)
+                # Index lookups; the first definition wins, as with a linear scan
+                self.zones_by_name.setdefault(zone_name, zone_info)
+                if zone_info.get('file_basename'):
+                    self.zones_by_file.setdefault(zone_info['file_basename'], zone_info)
         
         return self.zones
     
@@ -108,10 +160,11 @@ class NamedConfParser:
     
     def get_zone_by_name(self, zone_name):
         """Get zone info by name"""
-        for zone in self.zones:
-            if zone['name'] == zone_name:
-                return zone
-        return None
+        return self.zones_by_name.get(zone_name)
+    
+    def get_zone_by_file(self, file_basename):
+        """Get zone info by zone file basename"""
+        return self.zones_by_file.get(file_basename)
     
     def add_zone_entry(self, zone_name, zone_file, zone_type='master'):
         """Add a new zone entry to named.conf"""
@@ -141,3 +194,7 @@ zone "{zone_name}" {{
             f.write(zone_block)
         
         return True
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=NamedConfParser._after_fork)
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from config import config
+
+
+class PasswordHasher:
+    """
+    Bounded pool for bcrypt work.
+    bcrypt releases the GIL, so a few pool threads hash in parallel while
+    request threads only wait on the result. At most `workers` hashes run at
+    once and at most `max_queue` more wait; beyond that callers are turned
+    away immediately instead of piling up behind each other.
+    """
+    
+    def __init__(self, workers=None, max_queue=None, rounds=None):
+        self.workers = workers or config.BCRYPT_WORKERS
+        self.max_queue = max_queue if max_queue is not None else config.BCRYPT_MAX_QUEUE
+        self.rounds = rounds or config.BCRYPT_ROUNDS
+        self._executor = None
+        self._reset_state()
+    
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self.pending = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+    
+    def _after_fork(self):
+        # Pool threads do not survive fork; start a new pool on first use
+        self._executor = None
+        self._reset_state()
+    
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        return self._executor
+    
+    def _run(self, fn, args, queued_at):
+        started = time.monotonic()
+        with self._lock:
+            self.running += 1
+            self.wait_seconds += started - queued_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.pending -= 1
+                self.completed += 1
+                self.run_seconds += time.monotonic() - started
+            self._slots.release()
+    
+    def submit(self, fn, *args):
+        """Run fn(*args) in the pool and wait for it; None if the pool is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return None
+        
+        with self._lock:
+            self.pending += 1
+            # Jobs beyond the worker count have to wait for a thread
+            self.max_queue_depth = max(self.max_queue_depth, self.pending - self.workers)
+        
+        try:
+            future = self._get_executor().submit(self._run, fn, args, time.monotonic())
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+        return future.result()
+    
+    def hash(self, password):
+        """bcrypt hash (str) at the configured cost, or None if the pool is full"""
+        hashed = self.submit(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds))
+        return hashed.decode('utf-8') if hashed is not None else None
+    
+    def check(self, password, password_hash):
+        """True/False for a password match, or None if the pool is full"""
+        return self.submit(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+    
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different cost than BCRYPT_ROUNDS"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'rounds': self.rounds,
+                'running': self.running,
+                'queue_depth': self.pending - self.running,
+                'max_queue_depth': self.max_queue_depth,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_seconds / self.completed * 1000, 2) if self.completed else None,
+                'avg_run_ms': round(self.run_seconds / self.completed * 1000, 2) if self.completed else None
+            }
+
+
+password_hasher = PasswordHasher()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=password_hasher._after_fork)
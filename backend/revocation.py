@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from config import config
+from models import RevokedToken
+
+
+class RevocationList:
+    """
+    Per-process mirror of the revoked_tokens collection.
+    is_revoked() is only a dict lookup. A daemon thread in each worker pulls
+    revocations recorded since its previous pull every
+    REVOCATION_REFRESH_SECONDS; when MongoDB cannot be reached the last
+    good set keeps being used. Entries are dropped once the token they
+    refer to has expired (MongoDB's TTL index does the same).
+    """
+    
+    # revoked_at is stamped by whichever worker handled the logout, so re-read
+    # a short window before the newest one seen to tolerate clock differences
+    OVERLAP = timedelta(seconds=30)
+    
+    def __init__(self, refresh_interval=None):
+        self.refresh_interval = refresh_interval if refresh_interval is not None else config.REVOCATION_REFRESH_SECONDS
+        self._revoked = {}
+        self._loaded = False
+        self._last_seen = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.rejections = 0
+        self.last_refresh = None
+        self._reset_thread()
+    
+    def _reset_thread(self):
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+    
+    def _after_fork(self):
+        # The refresher thread stays with the parent; a worker keeps the
+        # inherited set and starts its own refresher right away
+        self._reset_thread()
+        self._ensure_thread()
+    
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None and not self._stopping.is_set():
+                    self._thread = threading.Thread(target=self._run, name='revocation-refresh', daemon=True)
+                    self._thread.start()
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.refresh_errors += 1
+                print(f"Revocation list refresh error: {e}")
+            self._stopping.wait(self.refresh_interval)
+    
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def is_revoked(self, jti):
+        """True if the token ID is on the deny-list"""
+        if not jti:
+            return False
+        
+        # Processes that were not forked (development server) start it here
+        if self._thread is None:
+            self._ensure_thread()
+        
+        if jti in self._revoked:
+            self.rejections += 1
+            return True
+        return False
+    
+    def add(self, jti, expires_at):
+        """Record a revocation made by this process without waiting for a refresh"""
+        with self._lock:
+            self._revoked[jti] = expires_at
+    
+    def refresh(self):
+        """Pull new revocations from MongoDB and prune expired ones"""
+        since = self._last_seen - self.OVERLAP if self._last_seen else None
+        
+        try:
+            docs = RevokedToken.find_since(since)
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"Revocation list refresh error: {e}")
+            return False
+        
+        now = datetime.utcnow()
+        with self._lock:
+            for doc in docs:
+                self._revoked[doc['jti']] = doc['expires_at']
+                if self._last_seen is None or doc['revoked_at'] > self._last_seen:
+                    self._last_seen = doc['revoked_at']
+            
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[jti]
+        
+        self._loaded = True
+        self.refreshes += 1
+        self.last_refresh = time.time()
+        return True
+    
+    def stats(self):
+        return {
+            'entries': len(self._revoked),
+            'loaded': self._loaded,
+            'refresh_interval': self.refresh_interval,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'last_refresh': self.last_refresh,
+            'refresher_running': self._thread is not None and self._thread.is_alive(),
+            'rejections': self.rejections
+        }
+
+
+revocation_list = RevocationList()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=revocation_list._after_fork)
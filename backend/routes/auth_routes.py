@@ -16,6 +16,8 @@ def login():
     
     if result['success']:
         return jsonify(result), 200
+    elif result.get('busy'):
+        return jsonify(result), 503, {'Retry-After': '1'}
     else:
         return jsonify(result), 401
 
@@ -25,7 +27,7 @@ def login():
 def logout():
     """User logout endpoint"""
     username = g.user['username']
-    result = logout_user(username)
+    result = logout_user(username, g.user)
     return jsonify(result), 200
 
 
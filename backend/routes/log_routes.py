@@ -1,57 +1,165 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from auth import token_required
-from models import EventLog
+from bson.errors import InvalidId
+from datetime import datetime, timedelta, timezone
+from auth import token_required, admin_required
+from models import EventLog, EventRollup
+import base64
 
 log_bp = Blueprint('log', __name__)
 
+# Fields a client may ask for with ?fields=a,b,c
+LOG_FIELDS = ('timestamp', 'user', 'action', 'status', 'zone', 'record_type', 'details', 'error_message')
 
-@log_bp.route('/logs', methods=['GET'])
-@token_required
-def get_logs():
-    """Get event logs with optional filters"""
-    # Get query parameters
-    limit = request.args.get('limit', 100, type=int)
-    user_filter = request.args.get('user', None)
-    action_filter = request.args.get('action', None)
+
+def _encode_cursor(log):
+    """Opaque cursor pointing just past log (its timestamp and _id)"""
+    raw = f"{log['timestamp'].isoformat()}|{log['_id']}"
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    timestamp, log_id = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii').split('|')
+    return datetime.fromisoformat(timestamp), ObjectId(log_id)
+
+
+def _parse_time(value):
+    """ISO 8601 timestamp (trailing Z allowed) as a naive UTC datetime"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _page_params(default_limit, max_limit):
+    """
+    Read limit, cursor, since, until and fields from the query string.
+    Returns (params, error_response).
+    """
+    params = {'limit': min(max(request.args.get('limit', default_limit, type=int), 1), max_limit)}
     
-    # Limit maximum to 500
-    limit = min(limit, 500)
+    try:
+        if request.args.get('cursor'):
+            params['before'] = _decode_cursor(request.args['cursor'])
+    except (ValueError, InvalidId, UnicodeError):
+        return None, (jsonify({'success': False, 'error': 'Invalid cursor'}), 400)
     
-    # Fetch logs
-    logs = EventLog.find_recent(limit=limit, user=user_filter, action=action_filter)
+    for name in ('since', 'until'):
+        if request.args.get(name):
+            try:
+                params[name] = _parse_time(request.args[name])
+            except ValueError:
+                return None, (jsonify({'success': False, 'error': f"Invalid '{name}' timestamp, use ISO 8601"}), 400)
     
-    # Convert ObjectId to string for JSON serialization
-    for log in logs:
-        log['_id'] = str(log['_id'])
-        # Convert datetime to ISO format string
-        if 'timestamp' in log:
-            log['timestamp'] = log['timestamp'].isoformat() + 'Z'
+    if request.args.get('fields'):
+        fields = [f.strip() for f in request.args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in LOG_FIELDS]
+        if unknown:
+            return None, (jsonify({'success': False, 'error': f"Unknown fields: {', '.join(unknown)}"}), 400)
+        params['fields'] = fields
     
+    return params, None
+
+
+def _page_response(logs, has_more):
     return jsonify({
         'success': True,
         'logs': logs,
-        'count': len(logs)
+        'count': len(logs),
+        'next_cursor': _encode_cursor(logs[-1]) if has_more and logs else None
     }), 200
 
 
+@log_bp.route('/logs', methods=['GET'])
+@token_required
+def get_logs():
+    """
+    Get event logs with optional filters, newest first.
+    Pass the returned next_cursor as ?cursor= to fetch the next (older) page.
+    """
+    params, error = _page_params(default_limit=100, max_limit=500)
+    if error:
+        return error
+    
+    logs, has_more = EventLog.find_page(
+        user=request.args.get('user'),
+        action=request.args.get('action'),
+        **params
+    )
+    return _page_response(logs, has_more)
+
+
 @log_bp.route('/logs/zone/<zone>', methods=['GET'])
 @token_required
 def get_zone_logs(zone):
-    """Get event logs for a specific zone"""
-    limit = request.args.get('limit', 50, type=int)
-    limit = min(limit, 200)
+    """Get event logs for a specific zone (same paging parameters as /logs)"""
+    params, error = _page_params(default_limit=50, max_limit=200)
+    if error:
+        return error
+    
+    logs, has_more = EventLog.find_page(zone=zone, **params)
+    return _page_response(logs, has_more)
+
+
+@log_bp.route('/logs/analytics', methods=['GET'])
+@token_required
+def get_log_analytics():
+    """
+    Event counts, failure rates and durations from the hourly rollups.
+    ?group_by=zone,action&bucket=day|hour|total&since=&until= plus optional
+    action, status, user and zone filters. Defaults to the last 30 days.
+    """
+    group_by = [g.strip() for g in request.args.get('group_by', 'action').split(',') if g.strip()]
+    unknown = [g for g in group_by if g not in EventRollup.DIMENSIONS]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Cannot group by: {', '.join(unknown)}"}), 400
     
-    logs = EventLog.find_by_zone(zone, limit=limit)
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in EventRollup.BUCKETS:
+        return jsonify({'success': False, 'error': f"bucket must be one of {', '.join(EventRollup.BUCKETS)}"}), 400
     
-    # Convert ObjectId to string for JSON serialization
-    for log in logs:
-        log['_id'] = str(log['_id'])
-        if 'timestamp' in log:
-            log['timestamp'] = log['timestamp'].isoformat() + 'Z'
+    try:
+        since = _parse_time(request.args['since']) if request.args.get('since') else datetime.utcnow() - timedelta(days=30)
+        until = _parse_time(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid since/until timestamp, use ISO 8601'}), 400
+    
+    filters = {d: request.args.get(d) for d in EventRollup.DIMENSIONS}
+    rows = EventRollup.query(group_by=group_by, bucket=bucket, since=since, until=until, filters=filters)
     
     return jsonify({
         'success': True,
-        'logs': logs,
-        'count': len(logs)
+        'group_by': group_by,
+        'bucket': bucket,
+        'since': since,
+        'until': until,
+        'rows': rows,
+        'count': len(rows)
     }), 200
+
+
+@log_bp.route('/logs/analytics/rebuild', methods=['POST'])
+@admin_required
+def rebuild_log_analytics():
+    """Recompute rollups from event_logs (optionally only from ?since= onwards)"""
+    try:
+        since = _parse_time(request.args['since']) if request.args.get('since') else None
+    except ValueError:
+        return jsonify({'success': False, 'error': "Invalid 'since' timestamp, use ISO 8601"}), 400
+    
+    try:
+        events = EventRollup.rebuild(since=since)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'events': events}), 200
+
+
+@log_bp.route('/logs/retention', methods=['GET'])
+@admin_required
+def get_log_retention():
+    """Show configured retention, the TTL index in place and the oldest event"""
+    result = EventLog.retention_status()
+    return jsonify(result), 200 if result['success'] else 500
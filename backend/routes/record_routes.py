@@ -27,6 +27,8 @@ def add_record(zone_file):
     
     if result['success']:
         return jsonify(result), 201
+    elif result.get('duplicate'):
+        return jsonify(result), 409
     else:
         return jsonify(result), 500
 
@@ -77,3 +79,25 @@ def delete_record(zone_file):
         return jsonify(result), 200
     else:
         return jsonify(result), 500
+
+
+@record_bp.route('/zones/<zone_file>/records/batch', methods=['POST'])
+@token_required
+def batch_records(zone_file):
+    """Apply an ordered list of add/update/delete operations atomically"""
+    data = request.get_json()
+    
+    if not data or 'operations' not in data:
+        return jsonify({'success': False, 'error': 'operations list required'}), 400
+    
+    username = g.user['username']
+    
+    result = DNSOperations.apply_batch(zone_file, data['operations'], username)
+    
+    if result['success']:
+        return jsonify(result), 200
+    elif 'index' in result:
+        # Rejected operation (invalid or not matching); nothing was written
+        return jsonify(result), 400
+    else:
+        return jsonify(result), 500
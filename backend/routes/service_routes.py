@@ -1,6 +1,14 @@
-from flask import Blueprint, request, jsonify, g
+import json
+from flask import Blueprint, request, jsonify, g, current_app
 from auth import token_required, admin_required
 from dns_operations import DNSOperations
+from zone_cache import zone_cache
+from token_cache import token_cache
+from revocation import revocation_list
+from password_hasher import password_hasher
+from models import event_writer
+from mongo import mongo
+from config import config
 
 service_bp = Blueprint('service', __name__)
 
@@ -31,3 +39,30 @@ def restart_named():
         return jsonify(result), 200
     else:
         return jsonify(result), 500
+
+
+def _watcher_stats():
+    """Slave sync metrics last written by the watcher process, if any"""
+    try:
+        with open(config.WATCHER_STATS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@service_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """Runtime cache and pool counters for capacity planning (admin only)"""
+    static_assets = current_app.extensions.get('static_assets')
+    return jsonify({
+        'success': True,
+        'zone_cache': zone_cache.stats(),
+        'token_cache': token_cache.stats(),
+        'revocation_list': revocation_list.stats(),
+        'password_hasher': password_hasher.stats(),
+        'event_writer': event_writer.stats(),
+        'mongo': mongo.stats(),
+        'watcher': _watcher_stats(),
+        'static_assets': static_assets.stats() if static_assets else None
+    }), 200
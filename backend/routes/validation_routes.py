@@ -47,9 +47,7 @@ def validate_zone(zone_name):
         from named_conf_parser import NamedConfParser
         
         # Get zone file path from named.conf
-        parser = NamedConfParser()
-        parser.parse()
-        zone_info = parser.get_zone_by_name(zone_name)
+        zone_info = NamedConfParser.cached().get_zone_by_name(zone_name)
         
         if not zone_info:
             return jsonify({
@@ -1,37 +1,134 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from auth import token_required
 from config import config
 from named_conf_parser import NamedConfParser
 from dns_parser import DNSParser
+from dns_operations import DNSOperations
+from zone_cache import zone_cache
+from json_provider import dumps
+import hashlib
 import os
 
 zone_bp = Blueprint('zones', __name__)
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Query parameters that switch the records route to filtered/paged output
+RECORD_QUERY_PARAMS = ('type', 'q', 'name', 'name_prefix', 'value', 'sort', 'order', 'offset', 'limit')
+
+# Records per chunk written to the client in streaming mode
+STREAM_BATCH_SIZE = 500
+
+
+def _file_identity(path):
+    """(inode, mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _make_etag(*parts):
+    """Strong ETag value from file identities and request variants"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _conditional(etag):
+    """Return a 304 response if the client already holds this ETag, else None"""
+    # Compressed responses carry the ETag with the encoding appended ("...:gzip")
+    candidates = [etag] + [f"{etag}:{algorithm}" for algorithm in ('br', 'gzip', 'deflate')]
+    if any(request.if_none_match.contains(candidate) for candidate in candidates):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _wants_ndjson():
+    """Check whether the client asked for a streamed NDJSON response"""
+    if request.args.get('stream') == 'ndjson':
+        return True
+    return NDJSON_MIMETYPE in request.headers.get('Accept', '')
+
+
+def _stream_records(dns_parser):
+    """
+    Generate NDJSON: one record per line, followed by a trailer line
+    {"success": true, "ttl": ..., "soa": ..., "count": N}.
+    On error the trailer is {"success": false, "error": ...}.
+    """
+    batch = []
+    count = 0
+    try:
+        for record in dns_parser.iter_records():
+            batch.append(dumps(record))
+            count += 1
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield '\n'.join(batch) + '\n'
+                batch = []
+        
+        if batch:
+            yield '\n'.join(batch) + '\n'
+        
+        yield dumps({
+            'success': True,
+            'ttl': dns_parser.ttl,
+            'soa': dns_parser.soa,
+            'count': count
+        }) + '\n'
+    
+    except Exception as e:
+        if batch:
+            yield '\n'.join(batch) + '\n'
+        yield dumps({'success': False, 'error': str(e)}) + '\n'
+
 @zone_bp.route('/zones', methods=['GET'])
 @token_required
 def get_zones():
     """Get all zones from named.conf"""
     try:
-        parser = NamedConfParser()
-        all_zones = parser.parse()
+        parser = NamedConfParser.cached()
         
         # Filter to only master zones and exclude special zones
+        master_zones = [zone for zone in parser.zones
+                        if zone['type'] == 'master' and zone['zone_type'] != 'special' and zone['file']]
+        identities = [_file_identity(zone['file']) for zone in master_zones]
+        
+        # Validator: named.conf, the zone directory (zone files created/removed)
+        # and every listed zone file, including those outside the directory
+        etag = _make_etag(
+            'zones',
+            _file_identity(config.NAMED_CONF_PATH),
+            _file_identity(config.NAMED_ZONE_DIR),
+            [(zone['file'], identity) for zone, identity in zip(master_zones, identities)]
+        )
+        not_modified = _conditional(etag)
+        if not_modified:
+            return not_modified
+        
         zones = []
-        for zone in all_zones:
-            if zone['type'] == 'master' and zone['zone_type'] != 'special':
-                # Verify zone file exists
-                if zone['file'] and os.path.exists(zone['file']):
-                    zones.append({
-                        'name': zone['name'],
-                        'type': zone['zone_type'],
-                        'file': zone['file_basename'],
-                        'full_path': zone['file']
-                    })
+        for zone, identity in zip(master_zones, identities):
+            # Verify zone file exists
+            if identity is not None:
+                zones.append({
+                    'name': zone['name'],
+                    'type': zone['zone_type'],
+                    'file': zone['file_basename'],
+                    'full_path': zone['file']
+                })
         
-        return jsonify({
+        return _with_etag(jsonify({
             'success': True,
             'zones': zones
-        })
+        }), etag)
     
     except FileNotFoundError as e:
         return jsonify({
@@ -51,16 +148,8 @@ def get_zones():
 def get_zone_records(zone_file):
     """Get all records for a specific zone"""
     try:
-        # Parse named.conf to get zones
-        parser = NamedConfParser()
-        parser.parse()
-        
-        # Find the zone by file basename
-        zone_info = None
-        for zone in parser.zones:
-            if zone.get('file_basename') == zone_file:
-                zone_info = zone
-                break
+        # Find the zone by file basename (named.conf parse is cached)
+        zone_info = NamedConfParser.cached().get_zone_by_file(zone_file)
         
         if not zone_info:
             return jsonify({
@@ -76,19 +165,68 @@ def get_zone_records(zone_file):
                 'error': f'Zone file does not exist: {zone_file_path}'
             }), 404
         
-        # Parse the zone file
+        # Validator: zone file identity plus the response variant, checked before parsing
+        etag = _make_etag(
+            'records',
+            zone_file_path,
+            _file_identity(zone_file_path),
+            _wants_ndjson(),
+            sorted(request.args.items(multi=True))
+        )
+        not_modified = _conditional(etag)
+        if not_modified:
+            return not_modified
+        
         dns_parser = DNSParser(zone_file_path)
-        zone_data = dns_parser.parse()
         
-        return jsonify({
-            'success': True,
-            'data': zone_data
-        })
-    
-        return jsonify({
+        # Streaming mode: constant memory regardless of zone size
+        if _wants_ndjson():
+            return _with_etag(Response(
+                stream_with_context(_stream_records(dns_parser)),
+                mimetype=NDJSON_MIMETYPE
+            ), etag)
+        
+        # Parse the zone file (served from the parsed-zone cache when unchanged)
+        zone_data = zone_cache.get(zone_file_path)
+        
+        if not any(param in request.args for param in RECORD_QUERY_PARAMS):
+            return _with_etag(jsonify({
+                'success': True,
+                'data': zone_data
+            }), etag)
+        
+        # Server-side filtering, sorting and pagination
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = request.args.get('limit', None, type=int)
+        if limit is not None:
+            limit = min(max(limit, 0), config.RECORDS_MAX_PAGE_SIZE)
+        
+        types = [t for t in request.args.get('type', '').split(',') if t.strip()]
+        
+        records, total = DNSOperations.query_records(
+            zone_data['records'],
+            types=[t.strip() for t in types],
+            search=request.args.get('q'),
+            name=request.args.get('name'),
+            name_prefix=request.args.get('name_prefix'),
+            value=request.args.get('value'),
+            sort=request.args.get('sort'),
+            descending=request.args.get('order') == 'desc',
+            offset=offset,
+            limit=limit
+        )
+        
+        return _with_etag(jsonify({
             'success': True,
-            'data': zone_data
-        })
+            'data': {
+                'ttl': zone_data['ttl'],
+                'soa': zone_data['soa'],
+                'records': records
+            },
+            'total': total,
+            'offset': offset,
+            'limit': limit
+        }), etag)
     
     except Exception as e:
         return jsonify({
@@ -18,6 +18,8 @@ def sync_zone():
     """
     Receives a sync request from Master.
     Payload: {"filename": "example.com.hosts", "secret": "..."}
+    or several files at once (named is restarted only once):
+    {"filenames": ["example.com.hosts", "1.168.192.rev"], "secret": "..."}
     """
     data = request.json
     if not data:
@@ -28,25 +30,26 @@ def sync_zone():
         logging.warning(f"Invalid secret attempt from {request.remote_addr}")
         return jsonify({'error': 'Unauthorized'}), 401
         
-    filename = data.get('filename')
-    if not filename:
+    filenames = data.get('filenames') or ([data['filename']] if data.get('filename') else [])
+    if not filenames or not isinstance(filenames, list):
         return jsonify({'error': 'Filename missing'}), 400
         
-    # Security: Ensure filename is just a basename, no paths
-    filename = os.path.basename(filename)
+    # Security: Ensure filenames are just basenames, no paths
+    filenames = [os.path.basename(str(f)) for f in filenames]
     
     slave_dir = config.SLAVE_DIR
-    file_path = os.path.join(slave_dir, filename)
     
     try:
-        logging.info(f"Received sync request for {filename}")
+        logging.info(f"Received sync request for {', '.join(filenames)}")
         
-        # 1. Remove the slave file to force re-transfer
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logging.info(f"Deleted file: {file_path}")
-        else:
-            logging.info(f"File not found (already deleted?): {file_path}")
+        # 1. Remove the slave files to force re-transfer
+        for filename in filenames:
+            file_path = os.path.join(slave_dir, filename)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                logging.info(f"Deleted file: {file_path}")
+            else:
+                logging.info(f"File not found (already deleted?): {file_path}")
             
         # 2. Restart Named
         cmd = [config.SYSTEMCTL_PATH, 'restart', 'named']
@@ -54,7 +57,7 @@ def sync_zone():
         
         if result.returncode == 0:
             logging.info("Named service restarted successfully")
-            return jsonify({'success': True, 'message': 'Sync complete'}), 200
+            return jsonify({'success': True, 'message': 'Sync complete', 'files': filenames}), 200
         else:
             logging.error(f"Failed to restart named: {result.stderr}")
             return jsonify({'success': False, 'error': result.stderr}), 500
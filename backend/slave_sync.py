@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from config import config
+
+
+class HostStats:
+    """Sync counters and latency for one slave"""
+    
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = None
+        self.last_success = None
+        self.last_failure = None
+        self.last_error = None
+    
+    def record(self, ok, seconds, error=None):
+        self.attempts += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_seconds = seconds
+        if ok:
+            self.successes += 1
+            self.last_success = time.time()
+        else:
+            self.failures += 1
+            self.last_failure = time.time()
+            self.last_error = error
+    
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'successes': self.successes,
+            'failures': self.failures,
+            'success_rate': round(self.successes / self.attempts, 4) if self.attempts else None,
+            'avg_ms': round(self.total_seconds / self.attempts * 1000, 1) if self.attempts else None,
+            'max_ms': round(self.max_seconds * 1000, 1),
+            'last_ms': round(self.last_seconds * 1000, 1) if self.last_seconds is not None else None,
+            'last_success': self.last_success,
+            'last_failure': self.last_failure,
+            'last_error': self.last_error
+        }
+
+
+class SlaveSyncer:
+    """
+    Sends sync triggers to every slave agent at once.
+    Each slave has its own keep-alive requests.Session, and a thread pool
+    posts to all of them in parallel, so one round takes as long as the
+    slowest slave rather than the sum of all of them.
+    """
+    
+    def __init__(self, hosts=None, port=None, secret=None, timeout=None, workers=None):
+        self.hosts = list(hosts if hosts is not None else config.SLAVE_SERVERS)
+        self.port = port or config.SLAVE_API_PORT
+        self.secret = secret if secret is not None else config.SLAVE_SECRET
+        self.timeout = timeout or config.SLAVE_SYNC_TIMEOUT
+        self.workers = workers or config.SLAVE_SYNC_WORKERS or max(1, len(self.hosts))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='slave-sync')
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stats = {host: HostStats() for host in self.hosts}
+        self.rounds = 0
+        self.files = 0
+        self.last_round_seconds = None
+        self.max_round_seconds = 0.0
+    
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # One slave gets one request at a time; keep that connection open
+                session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+                self._sessions[host] = session
+            return session
+    
+    def _post(self, host, payload):
+        try:
+            resp = self._session(host).post(f"http://{host}:{self.port}/sync", json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            return False, str(e), None
+        if resp.status_code == 200:
+            return True, None, resp.status_code
+        return False, f"HTTP {resp.status_code}: {resp.text[:200]}", resp.status_code
+    
+    def sync_host(self, host, filenames):
+        """POST one sync trigger covering all filenames; returns (ok, error)"""
+        if len(filenames) == 1:
+            payload = {'filename': filenames[0], 'secret': self.secret}
+        else:
+            payload = {'filenames': filenames, 'secret': self.secret}
+        
+        started = time.monotonic()
+        ok, error, status = self._post(host, payload)
+        if status == 400 and len(filenames) > 1:
+            # Agent predating multi-file syncs: fall back to one request per file
+            results = [self._post(host, {'filename': name, 'secret': self.secret}) for name in filenames]
+            ok = all(result[0] for result in results)
+            error = next((result[1] for result in results if not result[0]), None)
+        elapsed = time.monotonic() - started
+        
+        with self._lock:
+            self._stats.setdefault(host, HostStats()).record(ok, elapsed, error)
+        
+        names = ', '.join(filenames)
+        if ok:
+            logging.info(f"SUCCESS: Synced {names} to {host} in {elapsed * 1000:.0f} ms.")
+        else:
+            logging.error(f"FAILURE: syncing {names} to {host}: {error}")
+        return ok, error
+    
+    def sync(self, filenames):
+        """
+        Trigger a sync of one or more zone files on every slave in parallel,
+        one request per slave; returns {host: (ok, error)}
+        """
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        if not self.hosts:
+            logging.warning("No SLAVE_SERVERS configured. Skipping sync.")
+            return {}
+        return self.sync_batches({host: filenames for host in self.hosts})
+    
+    def sync_batches(self, batches):
+        """Send each slave its own list of files ({host: [filenames]}) in parallel"""
+        started = time.monotonic()
+        futures = {host: self._executor.submit(self.sync_host, host, filenames)
+                   for host, filenames in batches.items()}
+        results = {host: future.result() for host, future in futures.items()}
+        elapsed = time.monotonic() - started
+        
+        with self._lock:
+            self.rounds += 1
+            self.files += len({f for filenames in batches.values() for f in filenames})
+            self.last_round_seconds = elapsed
+            self.max_round_seconds = max(self.max_round_seconds, elapsed)
+        
+        succeeded = sum(1 for ok, _ in results.values() if ok)
+        logging.info(f"Sync round: {succeeded}/{len(results)} slaves in {elapsed * 1000:.0f} ms.")
+        return results
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'slaves': {host: stats.to_dict() for host, stats in self._stats.items()},
+                'rounds': self.rounds,
+                'files': self.files,
+                'last_round_ms': round(self.last_round_seconds * 1000, 1) if self.last_round_seconds is not None else None,
+                'max_round_ms': round(self.max_round_seconds * 1000, 1),
+                'updated': time.time()
+            }
+    
+    def write_stats(self, path=None, stats=None):
+        """Atomically replace the stats file read by the API's /metrics"""
+        path = path if path is not None else config.WATCHER_STATS_PATH
+        stats = stats if stats is not None else self.stats()
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(stats, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"Could not write watcher stats to {path}: {e}")
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for session in self._sessions.values():
+            session.close()
+
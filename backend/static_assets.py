@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fingerprinted URLs (?v=<content hash>) never change, so browsers may keep them
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Anything else is revalidated with its ETag (a 304 costs no body)
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/css', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml', 'text/plain'
+)
+
+# Local href/src references in HTML that get a ?v=<hash> suffix
+_REFERENCE_RE = re.compile(r'((?:href|src)=")([^"?#:]+)(")')
+
+
+class StaticAssets:
+    """
+    In-memory copy of the frontend directory.
+    Every file is read once at startup, hashed, and stored together with
+    gzip and brotli variants, so serving it is a dict lookup. Local asset
+    references in HTML are rewritten to content-hashed URLs that can be
+    cached for a year; HTML itself is revalidated through its ETag.
+    """
+    
+    def __init__(self, root, min_size=1024, watch=False):
+        self.root = os.path.abspath(root)
+        self.min_size = min_size
+        self.watch = watch
+        self._assets = {}
+        self._identity = None
+        self.load()
+    
+    def _tree_identity(self):
+        """(path, mtime_ns, size) of every file, used to detect edits in watch mode"""
+        identity = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                st = os.stat(path)
+                identity.append((path, st.st_mtime_ns, st.st_size))
+        return tuple(identity)
+    
+    def load(self):
+        """(Re)read and precompress every file under root"""
+        identity = self._tree_identity()
+        assets = {}
+        html = []
+        
+        for path, _, _ in identity:
+            name = os.path.relpath(path, self.root).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            if mimetype == 'text/html':
+                html.append((name, data))
+            else:
+                assets[name] = self._build(data, mimetype)
+        
+        # HTML last: its references embed the hashes of the other assets
+        for name, data in html:
+            base = os.path.dirname(name)
+            
+            def fingerprint(match):
+                target = os.path.normpath(os.path.join(base, match.group(2))).replace(os.sep, '/')
+                asset = assets.get(target)
+                if asset is None:
+                    return match.group(0)
+                return f"{match.group(1)}{match.group(2)}?v={asset['version']}{match.group(3)}"
+            
+            text = data.decode('utf-8')
+            data = _REFERENCE_RE.sub(fingerprint, text).encode('utf-8')
+            assets[name] = self._build(data, 'text/html')
+        
+        self._assets = assets
+        self._identity = identity
+    
+    def _build(self, data, mimetype):
+        """Asset entry: content hash plus identity/gzip/brotli bodies"""
+        version = hashlib.sha256(data).hexdigest()[:16]
+        bodies = {None: data}
+        
+        if mimetype in COMPRESSIBLE_TYPES and len(data) >= self.min_size:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                bodies['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    bodies['br'] = compressed
+        
+        if mimetype.startswith('text/') or mimetype == 'application/javascript':
+            mimetype += '; charset=utf-8'
+        
+        return {'version': version, 'mimetype': mimetype, 'bodies': bodies}
+    
+    def stats(self):
+        """Asset count and in-memory size per encoding"""
+        sizes = {'identity': 0, 'gzip': 0, 'br': 0}
+        for asset in self._assets.values():
+            for encoding, body in asset['bodies'].items():
+                sizes[encoding or 'identity'] += len(body)
+        return {'assets': len(self._assets), 'bytes': sizes}
+    
+    def response(self, name):
+        """Build the response for a frontend path, or None if it is unknown"""
+        if self.watch and self._tree_identity() != self._identity:
+            self.load()
+        
+        asset = self._assets.get(name)
+        if asset is None:
+            return None
+        
+        encoding = None
+        for candidate in ('br', 'gzip'):
+            if candidate in asset['bodies'] and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        
+        # One strong ETag per representation
+        etag = asset['version'] + ('-' + encoding if encoding else '')
+        if request.args.get('v') == asset['version']:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = REVALIDATE_CACHE_CONTROL
+        
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(asset['bodies'][encoding], content_type=asset['mimetype'])
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        if len(asset['bodies']) > 1:
+            response.headers['Vary'] = 'Accept-Encoding'
+        return response
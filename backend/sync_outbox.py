@@ -0,0 +1,194 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from config import config
+
+
+class SyncOutbox:
+    """
+    Durable queue of pending (slave, zone file) syncs, stored in SQLite.
+    There is at most one row per slave and file: a newer change to a file
+    that is still pending replaces the old entry. A background thread sends
+    everything due, one request per slave, and deletes rows the slave
+    accepted. Failed rows are retried with exponential backoff and jitter.
+    Rows survive a watcher restart and are sent again when it starts.
+    """
+    
+    def __init__(self, syncer, path=None, base_delay=None, max_delay=None):
+        self.syncer = syncer
+        self.path = path if path is not None else config.SLAVE_OUTBOX_PATH
+        self.base_delay = base_delay if base_delay is not None else config.SLAVE_RETRY_BASE_SECONDS
+        self.max_delay = max_delay if max_delay is not None else config.SLAVE_RETRY_MAX_SECONDS
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.delivered = 0
+        self.retries = 0
+        self.failures = 0
+        
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS pending (
+                host TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                created REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                PRIMARY KEY (host, filename)
+            )
+        ''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS pending_next_attempt ON pending (next_attempt)')
+        self._drop_unknown_hosts()
+    
+    def _drop_unknown_hosts(self):
+        """Forget entries for slaves that are no longer configured"""
+        hosts = set(self.syncer.hosts)
+        with self._lock, self._db:
+            rows = self._db.execute('SELECT DISTINCT host FROM pending').fetchall()
+            for (host,) in rows:
+                if host not in hosts:
+                    self._db.execute('DELETE FROM pending WHERE host = ?', (host,))
+                    logging.warning(f"Outbox: dropped pending syncs for removed slave {host}")
+    
+    def add(self, filenames, hosts=None):
+        """Queue filenames for every slave (or hosts) and wake the sender"""
+        hosts = self.syncer.hosts if hosts is None else hosts
+        now = time.time()
+        rows = [(host, filename) for host in hosts for filename in filenames]
+        with self._lock, self._db:
+            self._db.execute('BEGIN')
+            # A new change resets the backoff; created keeps the oldest pending time
+            self._db.executemany(
+                'UPDATE pending SET version = version + 1, attempts = 0, next_attempt = ? '
+                'WHERE host = ? AND filename = ?',
+                [(now, host, filename) for host, filename in rows]
+            )
+            self._db.executemany(
+                'INSERT OR IGNORE INTO pending (host, filename, created, next_attempt) VALUES (?, ?, ?, ?)',
+                [(host, filename, now, now) for host, filename in rows]
+            )
+        self._wake.set()
+    
+    def _due(self, now):
+        # Once a slave has anything due, everything pending for it rides along
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT host, filename, version, attempts FROM pending WHERE host IN '
+                '(SELECT host FROM pending WHERE next_attempt <= ?) ORDER BY host, filename',
+                (now,)
+            ).fetchall()
+        batches = {}
+        for host, filename, version, attempts in rows:
+            batches.setdefault(host, []).append((filename, version, attempts))
+        return batches
+    
+    def backoff(self, attempts):
+        """Exponential delay for the given attempt count, with half of it randomized"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def deliver(self):
+        """Send everything due now; returns the number of rows still pending"""
+        batches = self._due(time.time())
+        if batches:
+            results = self.syncer.sync_batches({
+                host: [filename for filename, _, _ in entries] for host, entries in batches.items()
+            })
+            now = time.time()
+            with self._lock, self._db:
+                self._db.execute('BEGIN')
+                for host, entries in batches.items():
+                    ok, error = results[host]
+                    # One retry time per slave, so its files are retried together
+                    retry_at = now + self.backoff(max(attempts for _, _, attempts in entries) + 1)
+                    for filename, version, attempts in entries:
+                        if attempts:
+                            self.retries += 1
+                        # Rows changed while the request was in flight stay queued
+                        if ok:
+                            self._db.execute(
+                                'DELETE FROM pending WHERE host = ? AND filename = ? AND version = ?',
+                                (host, filename, version)
+                            )
+                            self.delivered += 1
+                        else:
+                            self._db.execute(
+                                'UPDATE pending SET attempts = ?, next_attempt = ?, last_error = ? '
+                                'WHERE host = ? AND filename = ? AND version = ?',
+                                (attempts + 1, retry_at, error, host, filename, version)
+                            )
+                            self.failures += 1
+        return self.depth()
+    
+    def depth(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM pending').fetchone()[0]
+    
+    def _next_due(self):
+        with self._lock:
+            return self._db.execute('SELECT MIN(next_attempt) FROM pending').fetchone()[0]
+    
+    def run(self, on_idle=None, idle_interval=15):
+        """Sender loop: deliver due entries, then sleep until the next one is due"""
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                self.deliver()
+                if on_idle is not None:
+                    on_idle()
+            except Exception as e:
+                logging.error(f"EXCEPTION delivering outbox: {e}")
+            
+            next_due = self._next_due()
+            timeout = idle_interval if next_due is None else min(idle_interval, max(0.0, next_due - time.time()))
+            self._wake.wait(timeout)
+    
+    def start(self, on_idle=None):
+        self._thread = threading.Thread(target=self.run, args=(on_idle,), name='sync-outbox', daemon=True)
+        self._thread.start()
+        return self._thread
+    
+    def stop(self, timeout=10):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._lock:
+            self._db.close()
+    
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            depth, oldest, max_attempts = self._db.execute(
+                'SELECT COUNT(*), MIN(created), MAX(attempts) FROM pending'
+            ).fetchone()
+            per_host = self._db.execute(
+                'SELECT host, COUNT(*), MIN(created), MAX(attempts), MIN(next_attempt) FROM pending GROUP BY host'
+            ).fetchall()
+        return {
+            'depth': depth,
+            'oldest_age_seconds': round(now - oldest, 1) if oldest is not None else None,
+            'max_attempts': max_attempts or 0,
+            'delivered': self.delivered,
+            'retries': self.retries,
+            'failures': self.failures,
+            'slaves': {
+                host: {
+                    'depth': count,
+                    'oldest_age_seconds': round(now - created, 1),
+                    'attempts': attempts,
+                    'next_attempt_in': round(max(0.0, next_attempt - now), 1)
+                }
+                for host, count, created, attempts, next_attempt in per_host
+            }
+        }
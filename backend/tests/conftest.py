@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Modules are imported the way the app runs them (from the backend directory)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the suite away from a real MongoDB and system paths
+os.environ.setdefault('MONGO_URI', 'mongodb://localhost:1/')
+os.environ.setdefault('MONGO_SERVER_SELECTION_TIMEOUT_MS', '100')
+os.environ.setdefault('MONGO_CONNECT_TIMEOUT_MS', '100')
+os.environ.setdefault('EVENT_SPILL_PATH', '')
+os.environ.setdefault('ZONE_LOCK_DIR', tempfile.mkdtemp(prefix='dns-manager-locks-'))
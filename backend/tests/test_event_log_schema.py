@@ -0,0 +1,115 @@
+import os
+import re
+from datetime import datetime
+import pytest
+import models
+from pymongo.errors import WriteError
+from dns_operations import DNSOperations
+from models import EventLog
+from mongo import MongoConnection, LazyCollection
+from zone_cache import zone_cache
+from config import config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INIT_SCRIPT = os.path.join(os.path.dirname(BACKEND_DIR), 'init-mongo.js')
+
+ZONE = """$TTL 86400
+@   IN SOA ns1.example.com. hostmaster.example.com. ( 2024010101 3600 900 604800 86400 )
+@   IN NS ns1.example.com.
+www IN A 192.0.2.10
+"""
+
+BSON_TYPES = {'date': datetime, 'string': str, 'object': dict}
+
+
+def schema_errors(document, validator=EventLog.VALIDATOR):
+    """The subset of $jsonSchema used by the event_logs validator"""
+    schema = validator['$jsonSchema']
+    errors = [f"missing {field}" for field in schema['required'] if field not in document]
+    for field, rule in schema['properties'].items():
+        if field not in document:
+            continue
+        if 'enum' in rule and document[field] not in rule['enum']:
+            errors.append(f"{field}={document[field]!r} not in enum")
+        if 'bsonType' in rule and not isinstance(document[field], BSON_TYPES[rule['bsonType']]):
+            errors.append(f"{field} is not a {rule['bsonType']}")
+    return errors
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Documents EventLog.create() hands to the background writer"""
+    documents = []
+    monkeypatch.setattr(models.event_writer, 'write', documents.append)
+    return documents
+
+
+def test_init_script_allows_the_same_actions():
+    with open(INIT_SCRIPT, encoding='utf-8') as f:
+        script = f.read()
+    enum = re.search(r"action: \{\s*enum: \[(.*?)\]", script, re.S).group(1)
+    
+    assert re.findall(r"'(\w+)'", enum) == EventLog.ACTIONS
+
+
+def test_every_logged_action_is_allowed():
+    used = set()
+    for directory, _, files in os.walk(BACKEND_DIR):
+        if 'tests' in directory.split(os.sep):
+            continue
+        for name in files:
+            if name.endswith('.py'):
+                with open(os.path.join(directory, name), encoding='utf-8') as f:
+                    used.update(re.findall(r"action='(\w+)'", f.read()))
+    
+    assert used
+    assert used <= set(EventLog.ACTIONS), used - set(EventLog.ACTIONS)
+
+
+def test_batch_event_passes_validator(tmp_path, monkeypatch, written):
+    monkeypatch.setattr(config, 'NAMED_ZONE_DIR', str(tmp_path))
+    (tmp_path / 'example.com.hosts').write_text(ZONE)
+    
+    result = DNSOperations.apply_batch('example.com.hosts', [
+        {'op': 'add', 'record': {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}}
+    ], 'admin')
+    zone_cache.clear()
+    
+    assert result['success'], result
+    assert [doc['action'] for doc in written] == ['batch_records']
+    assert schema_errors(written[0]) == []
+
+
+def test_validator_rejects_unknown_action(written):
+    EventLog.create(user='admin', action='not_an_action', status='success')
+    
+    assert schema_errors(written[0]) == ["action='not_an_action' not in enum"]
+
+
+@pytest.mark.skipif(not os.getenv('MONGO_TEST_URI'), reason='set MONGO_TEST_URI to run against MongoDB')
+def test_insert_against_migrated_validator(monkeypatch, written):
+    connection = MongoConnection(os.getenv('MONGO_TEST_URI'), database='dns_manager_test')
+    monkeypatch.setattr(models, 'mongo', connection)
+    monkeypatch.setattr(models, 'event_logs_collection', LazyCollection(connection, 'event_logs'))
+    db = connection.db
+    db.drop_collection('event_logs')
+    # Validator as created by the previous init-mongo.js
+    old = {'$jsonSchema': dict(EventLog.VALIDATOR['$jsonSchema'], properties=dict(
+        EventLog.VALIDATOR['$jsonSchema']['properties'],
+        action={'enum': ['login', 'logout', 'add_record', 'update_record', 'delete_record',
+                         'reload_zone', 'restart_service']}
+    ))}
+    db.create_collection('event_logs', validator=old)
+    
+    try:
+        EventLog.create(user='admin', action='batch_records', status='success', zone='example.com.hosts',
+                        details={'operations': 1, 'add': 1}, duration_ms=1.5)
+        with pytest.raises(WriteError):
+            db.event_logs.insert_one(dict(written[0]))
+        
+        assert EventLog.update_validator()
+        db.event_logs.insert_one(written[0])
+        assert db.event_logs.count_documents({'action': 'batch_records'}) == 1
+    finally:
+        db.drop_collection('event_logs')
+        connection.close()
@@ -0,0 +1,45 @@
+import threading
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+from event_writer import EventWriter
+
+
+def test_counters_are_exact_under_concurrent_writes():
+    stored = []
+    writer = EventWriter(stored.extend, batch_size=50, flush_interval=0.01, queue_size=100000, spill_path='')
+    threads = [threading.Thread(target=lambda: [writer.write({'n': i}) for i in range(2000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+    
+    stats = writer.stats()
+    assert stats['enqueued'] == 16000
+    assert stats['written'] == len(stored) == 16000
+
+
+def test_rejected_documents_are_counted_not_retried():
+    def insert_many(documents):
+        raise BulkWriteError({'writeErrors': [{'index': 0, 'code': 121, 'errmsg': 'Document failed validation'}]})
+    writer = EventWriter(insert_many, flush_interval=0.01, spill_path='')
+    
+    writer.write({'action': 'unknown'})
+    writer.write({'action': 'login'})
+    writer.close()
+    
+    stats = writer.stats()
+    assert stats['rejected'] == 1
+    assert stats['written'] == 1
+    assert stats['dropped'] == 0
+    assert stats['last_error'] == 'Document failed validation'
+
+
+def test_unreachable_database_without_spill_file_drops():
+    def insert_many(documents):
+        raise ServerSelectionTimeoutError('down')
+    writer = EventWriter(insert_many, flush_interval=0.01, spill_path='')
+    
+    writer.write({'action': 'login'})
+    writer.close()
+    
+    assert writer.stats()['dropped'] == 1
@@ -0,0 +1,89 @@
+import pytest
+import dns_operations
+from app import app
+from auth import generate_token
+from config import config
+from dns_parser import DNSParser
+from zone_cache import zone_cache
+
+ZONE = """$TTL 86400
+@   IN SOA ns1.example.com. hostmaster.example.com. ( 2024010101 3600 900 604800 86400 )
+@   IN NS ns1.example.com.
+www 300 IN A 192.0.2.10
+"""
+
+
+@pytest.fixture
+def zone_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'NAMED_ZONE_DIR', str(tmp_path))
+    monkeypatch.setattr(dns_operations.EventLog, 'create', staticmethod(lambda *args, **kwargs: None))
+    (tmp_path / 'example.com.hosts').write_text(ZONE)
+    yield tmp_path
+    zone_cache.clear()
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def headers():
+    return {'Authorization': f"Bearer {generate_token('admin', 'admin')}"}
+
+
+def a_records(zone_dir):
+    return [r for r in DNSParser(str(zone_dir / 'example.com.hosts')).parse()['records'] if r['type'] == 'A']
+
+
+def test_add_record_created(zone_dir, client, headers):
+    response = client.post('/api/zones/example.com.hosts/records', headers=headers,
+                           json={'record': {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}})
+    
+    assert response.status_code == 201
+    assert {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'} in a_records(zone_dir)
+
+
+def test_add_duplicate_record_is_a_conflict(zone_dir, client, headers):
+    response = client.post('/api/zones/example.com.hosts/records', headers=headers,
+                           json={'record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10'}})
+    
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'Record already exists'
+
+
+def test_add_invalid_record_is_a_bad_request(zone_dir, client, headers):
+    response = client.post('/api/zones/example.com.hosts/records', headers=headers,
+                           json={'record': {'type': 'A', 'name': 'bad', 'ipv4': 'not-an-ip'}})
+    
+    assert response.status_code == 400
+
+
+def test_update_without_ttl_keeps_existing_ttl(zone_dir, client, headers):
+    response = client.put('/api/zones/example.com.hosts/records', headers=headers, json={
+        'old_record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10', 'ttl': '300'},
+        'new_record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.11'}
+    })
+    
+    assert response.status_code == 200
+    assert a_records(zone_dir) == [{'type': 'A', 'name': 'www', 'ipv4': '192.0.2.11', 'ttl': '300'}]
+
+
+def test_update_with_empty_ttl_clears_it(zone_dir, client, headers):
+    response = client.put('/api/zones/example.com.hosts/records', headers=headers, json={
+        'old_record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10', 'ttl': '300'},
+        'new_record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10', 'ttl': None}
+    })
+    
+    assert response.status_code == 200
+    assert a_records(zone_dir) == [{'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10'}]
+
+
+def test_batch_update_without_ttl_keeps_existing_ttl(zone_dir):
+    result = dns_operations.DNSOperations.apply_batch('example.com.hosts', [
+        {'op': 'update', 'old_record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10', 'ttl': '300'},
+         'new_record': {'type': 'A', 'name': 'web', 'ipv4': '192.0.2.10'}}
+    ], 'admin')
+    
+    assert result['success'], result
+    assert a_records(zone_dir) == [{'type': 'A', 'name': 'web', 'ipv4': '192.0.2.10', 'ttl': '300'}]
@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, timedelta
+import revocation
+from revocation import RevocationList
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_is_revoked_does_not_wait_for_mongodb(monkeypatch):
+    def slow_find_since(since):
+        time.sleep(1)
+        raise RuntimeError('MongoDB unreachable')
+    monkeypatch.setattr(revocation.RevokedToken, 'find_since', staticmethod(slow_find_since))
+    revoked = RevocationList(refresh_interval=10)
+    
+    started = time.monotonic()
+    assert not revoked.is_revoked('some-jti')
+    assert time.monotonic() - started < 0.1
+    revoked.stop(timeout=0)
+
+
+def test_failed_refresh_keeps_last_good_set(monkeypatch):
+    now = datetime.utcnow()
+    calls = []
+    
+    def find_since(since):
+        calls.append(since)
+        if len(calls) > 1:
+            raise RuntimeError('MongoDB unreachable')
+        return [{'jti': 'revoked', 'expires_at': now + timedelta(hours=1), 'revoked_at': now}]
+    monkeypatch.setattr(revocation.RevokedToken, 'find_since', staticmethod(find_since))
+    revoked = RevocationList(refresh_interval=0.05)
+    
+    revoked.is_revoked('other')
+    assert wait_for(lambda: revoked.refresh_errors >= 2)
+    assert revoked.is_revoked('revoked')
+    assert not revoked.is_revoked('other')
+    assert revoked.stats()['refreshes'] == 1
+    revoked.stop()
+
+
+def test_expired_entries_are_pruned(monkeypatch):
+    now = datetime.utcnow()
+    monkeypatch.setattr(revocation.RevokedToken, 'find_since', staticmethod(lambda since: []))
+    revoked = RevocationList(refresh_interval=10)
+    revoked.add('expired', now - timedelta(seconds=1))
+    revoked.add('live', now + timedelta(hours=1))
+    
+    assert revoked.refresh()
+    assert not revoked.is_revoked('expired')
+    assert revoked.is_revoked('live')
+    revoked.stop()
@@ -0,0 +1,238 @@
+import os
+import pytest
+from config import config
+from dns_parser import DNSParser
+from dns_operations import DNSOperations
+from zone_cache import zone_cache
+import dns_operations
+
+ZONE = """$TTL 86400
+@   IN SOA  ns1.example.com. hostmaster.example.com. (
+            2024010101 ; serial
+            3600
+            900
+            604800
+            86400 )
+
+; hand-written comment that a full rewrite would drop
+@       IN NS ns1.example.com.
+www     IN A 192.0.2.10 ; web
+mail    IN A 192.0.2.20
+@       IN MX 10 mail.example.com.
+"""
+
+
+def parse(path):
+    parser = DNSParser(str(path))
+    return parser, parser.parse()
+
+
+def identity(path):
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def patch(path, edits, serial='2024010102'):
+    parser, data = parse(path)
+    return parser.patch_zone_file(parser.layout(), identity(path), edits(data['records']), serial)
+
+
+def find(records, **fields):
+    return next(i for i, r in enumerate(records) if all(r.get(k) == v for k, v in fields.items()))
+
+
+def owners(path, rtype):
+    return [(r['name'], r.get('ipv4') or r.get('nameserver')) for r in parse(path)[1]['records'] if r['type'] == rtype]
+
+
+@pytest.fixture
+def zone(tmp_path):
+    path = tmp_path / 'example.com.hosts'
+    path.write_text(ZONE)
+    return path
+
+
+@pytest.fixture
+def zone_dir(tmp_path, monkeypatch):
+    """Point DNSOperations at tmp_path and keep audit events in memory"""
+    monkeypatch.setattr(config, 'NAMED_ZONE_DIR', str(tmp_path))
+    monkeypatch.setattr(dns_operations.EventLog, 'create', staticmethod(lambda *args, **kwargs: None))
+    yield tmp_path
+    zone_cache.clear()
+
+
+# --- patch_zone_file round-trips -------------------------------------------
+
+def test_add_appends_and_keeps_rest_of_file(zone):
+    record = {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}
+    assert patch(zone, lambda records: [(None, None, record)])
+    
+    text = zone.read_text()
+    assert '; hand-written comment' in text
+    assert text.endswith('IN A 192.0.2.30\n')
+    assert ('ftp', '192.0.2.30') in owners(zone, 'A')
+
+
+def test_update_replaces_only_that_statement(zone):
+    new = {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.11', 'comment': 'web'}
+    assert patch(zone, lambda records: [(find(records, ipv4='192.0.2.10'), records[find(records, ipv4='192.0.2.10')], new)])
+    
+    assert owners(zone, 'A') == [('www', '192.0.2.11'), ('mail', '192.0.2.20')]
+    assert '; hand-written comment' in zone.read_text()
+
+
+def test_delete_removes_statement(zone):
+    assert patch(zone, lambda records: [(find(records, name='mail', type='A'), records[find(records, name='mail', type='A')], None)])
+    
+    assert owners(zone, 'A') == [('www', '192.0.2.10')]
+    assert 'mail    IN A' not in zone.read_text()
+
+
+def test_serial_is_spliced_into_soa(zone):
+    assert patch(zone, lambda records: [], serial='2024010199')
+    
+    _, data = parse(zone)
+    assert data['soa']['serial'] == '2024010199'
+    assert data['soa']['primary_ns'] == 'ns1.example.com.'
+    assert data['soa']['minimum'] == '86400'
+    assert '2024010199 ; serial' in zone.read_text()
+
+
+def test_crlf_line_endings_are_kept(zone):
+    zone.write_bytes(ZONE.replace('\n', '\r\n').encode('ascii'))
+    record = {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}
+    assert patch(zone, lambda records: [(None, None, record)])
+    
+    raw = zone.read_bytes()
+    assert raw.count(b'\n') == raw.count(b'\r\n')
+    assert ('ftp', '192.0.2.30') in owners(zone, 'A')
+
+
+# --- cases that must fall back to write_zone_file --------------------------
+
+def test_edit_of_indented_line_followed_by_indented_line_is_refused(zone):
+    zone.write_text(ZONE + 'web     IN A 198.51.100.1\n        IN A 198.51.100.2\n        IN A 198.51.100.3\n')
+    new = {'type': 'A', 'name': 'other', 'ipv4': '198.51.100.2'}
+    
+    assert not patch(zone, lambda records: [(find(records, ipv4='198.51.100.2'), records[find(records, ipv4='198.51.100.2')], new)])
+    assert not patch(zone, lambda records: [(find(records, ipv4='198.51.100.2'), records[find(records, ipv4='198.51.100.2')], None)])
+
+
+def test_edit_of_last_indented_line_is_patched(zone):
+    zone.write_text(ZONE + 'web     IN A 198.51.100.1\n        IN A 198.51.100.2\n')
+    new = {'type': 'A', 'name': 'other', 'ipv4': '198.51.100.2'}
+    
+    assert patch(zone, lambda records: [(find(records, ipv4='198.51.100.2'), records[find(records, ipv4='198.51.100.2')], new)])
+    assert owners(zone, 'A')[-2:] == [('web', '198.51.100.1'), ('other', '198.51.100.2')]
+
+
+def test_changed_file_is_refused(zone):
+    parser, data = parse(zone)
+    layout, ident = parser.layout(), identity(zone)
+    with open(zone, 'a') as f:
+        f.write('late    IN A 192.0.2.99\n')
+    
+    assert not parser.patch_zone_file(layout, ident, [(None, None, {'type': 'A', 'name': 'x', 'ipv4': '192.0.2.1'})], '1')
+
+
+def test_append_after_inline_origin_is_refused(zone):
+    zone.write_text(ZONE + '$ORIGIN sub.example.com.\nhost    IN A 192.0.2.40\n')
+    record = {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}
+    
+    assert not patch(zone, lambda records: [(None, None, record)])
+
+
+def test_non_ascii_file_has_no_layout(zone):
+    zone.write_text(ZONE + 'txt     IN TXT "café"\n', encoding='utf-8')
+    parser, _ = parse(zone)
+    
+    assert parser.layout() is None
+
+
+# --- through DNSOperations (patch path and fallback) -----------------------
+
+def test_update_of_indented_record_keeps_following_owners(zone_dir):
+    (zone_dir / 'example.com.hosts').write_text(
+        ZONE + 'web     IN A 198.51.100.1\n        IN A 198.51.100.2\n        IN A 198.51.100.3\n'
+    )
+    result = DNSOperations.update_record(
+        'example.com.hosts',
+        {'type': 'A', 'name': 'web', 'ipv4': '198.51.100.2'},
+        {'type': 'A', 'name': 'mail', 'ipv4': '198.51.100.2'},
+        'test'
+    )
+    
+    assert result['success'], result
+    records = owners(zone_dir / 'example.com.hosts', 'A')
+    assert ('web', '198.51.100.1') in records
+    assert ('mail', '198.51.100.2') in records
+    assert ('web', '198.51.100.3') in records
+
+
+def test_update_of_ns_under_soa_keeps_following_owners(zone_dir):
+    (zone_dir / 'example.com.hosts').write_text(
+        "$TTL 3600\n"
+        "@   IN SOA ns1.example.com. hostmaster.example.com. ( 1 3600 900 604800 86400 )\n"
+        "    IN NS ns1.example.com.\n"
+        "    IN NS ns2.example.com.\n"
+        "www IN A 192.0.2.10\n"
+    )
+    result = DNSOperations.update_record(
+        'example.com.hosts',
+        {'type': 'NS', 'name': '@', 'nameserver': 'ns1.example.com.'},
+        {'type': 'NS', 'name': 'sub', 'nameserver': 'ns1.example.com.'},
+        'test'
+    )
+    
+    assert result['success'], result
+    assert sorted(owners(zone_dir / 'example.com.hosts', 'NS')) == [('@', 'ns2.example.com.'), ('sub', 'ns1.example.com.')]
+
+
+def test_add_update_delete_round_trip(zone_dir):
+    path = zone_dir / 'example.com.hosts'
+    path.write_text(ZONE)
+    
+    assert DNSOperations.add_record('example.com.hosts', {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}, 'test')['success']
+    assert DNSOperations.update_record(
+        'example.com.hosts',
+        {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10', 'comment': 'web'},
+        {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.11'},
+        'test'
+    )['success']
+    assert DNSOperations.delete_record('example.com.hosts', {'type': 'A', 'name': 'mail', 'ipv4': '192.0.2.20'}, 'test')['success']
+    
+    assert owners(path, 'A') == [('www', '192.0.2.11'), ('ftp', '192.0.2.30')]
+    # Every edit went through the in-place patch
+    assert '; hand-written comment' in path.read_text()
+
+
+def test_apply_batch_round_trip(zone_dir):
+    path = zone_dir / 'example.com.hosts'
+    path.write_text(ZONE)
+    
+    result = DNSOperations.apply_batch('example.com.hosts', [
+        {'op': 'add', 'record': {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}},
+        {'op': 'update', 'old_record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.10', 'comment': 'web'},
+         'new_record': {'type': 'A', 'name': 'www', 'ipv4': '192.0.2.11'}},
+        {'op': 'delete', 'record': {'type': 'MX', 'name': '@', 'priority': 10, 'mailserver': 'mail.example.com.'}}
+    ], 'test')
+    
+    assert result['success'], result
+    _, data = parse(path)
+    assert data['soa']['serial'] == result['serial']
+    assert owners(path, 'A') == [('www', '192.0.2.11'), ('mail', '192.0.2.20'), ('ftp', '192.0.2.30')]
+    assert not [r for r in data['records'] if r['type'] == 'MX']
+
+
+def test_apply_batch_is_all_or_nothing(zone_dir):
+    path = zone_dir / 'example.com.hosts'
+    path.write_text(ZONE)
+    
+    result = DNSOperations.apply_batch('example.com.hosts', [
+        {'op': 'add', 'record': {'type': 'A', 'name': 'ftp', 'ipv4': '192.0.2.30'}},
+        {'op': 'delete', 'record': {'type': 'A', 'name': 'nope', 'ipv4': '192.0.2.99'}}
+    ], 'test')
+    
+    assert not result['success']
+    assert result['index'] == 1
+    assert path.read_text() == ZONE
@@ -0,0 +1,57 @@
+import os
+import pytest
+from app import app
+from auth import generate_token
+from config import config
+
+ZONE = """$TTL 86400
+@   IN SOA ns1.example.com. hostmaster.example.com. ( 2024010101 3600 900 604800 86400 )
+@   IN NS ns1.example.com.
+"""
+
+
+@pytest.fixture
+def named(tmp_path, monkeypatch):
+    """Zone directory plus a zone that named.conf references by absolute path elsewhere"""
+    zone_dir = tmp_path / 'zones'
+    outside = tmp_path / 'elsewhere'
+    zone_dir.mkdir()
+    outside.mkdir()
+    (zone_dir / 'example.com.hosts').write_text(ZONE)
+    (outside / 'example.org.hosts').write_text(ZONE)
+    conf = tmp_path / 'named.conf'
+    conf.write_text(
+        'zone "example.com" { type master; file "example.com.hosts"; };\n'
+        f'zone "example.org" {{ type master; file "{outside / "example.org.hosts"}"; }};\n'
+    )
+    monkeypatch.setattr(config, 'NAMED_ZONE_DIR', str(zone_dir))
+    monkeypatch.setattr(config, 'NAMED_CONF_PATH', str(conf))
+    return outside / 'example.org.hosts'
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {generate_token('admin', 'admin')}"
+    return client
+
+
+def test_zones_revalidate_with_etag(named, client):
+    first = client.get('/api/zones')
+    assert first.status_code == 200
+    assert [zone['name'] for zone in first.get_json()['zones']] == ['example.com', 'example.org']
+    
+    again = client.get('/api/zones', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_etag_changes_with_zone_file_outside_zone_dir(named, client):
+    etag = client.get('/api/zones').headers['ETag']
+    
+    named.write_text(ZONE + 'www IN A 192.0.2.10\n')
+    stat = os.stat(named)
+    os.utime(named, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    
+    response = client.get('/api/zones', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from config import config
+
+
+class TokenCache:
+    """
+    Per-process LRU of verified JWTs.
+    Keys are SHA-256 digests of the raw token (the token itself is never
+    kept); values are the decoded payload and its `exp`. An entry is only
+    returned while `exp` is in the future, so expiry behaves exactly as
+    with a full jwt.decode.
+    """
+    
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries if max_entries is not None else config.TOKEN_CACHE_SIZE
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+    
+    def _after_fork(self):
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(token):
+        if isinstance(token, str):
+            token = token.encode('utf-8')
+        return hashlib.sha256(token).digest()
+    
+    def get(self, token):
+        """Return a copy of the cached payload for token, or None"""
+        key = self._key(token)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            payload, exp = entry
+            if exp is not None and exp <= time.time():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(payload)
+    
+    def put(self, token, payload):
+        """Remember a payload that has just passed signature verification"""
+        if self.max_entries <= 0:
+            return
+        key = self._key(token)
+        exp = payload.get('exp')
+        
+        with self._lock:
+            self._entries[key] = (dict(payload), exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def discard(self, token):
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'expired': self.expired,
+                'evictions': self.evictions
+            }
+
+
+token_cache = TokenCache()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=token_cache._after_fork)
@@ -2,9 +2,12 @@ import os
 import time
 import subprocess
 import logging
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from config import config
+from slave_sync import SlaveSyncer
+from sync_outbox import SyncOutbox
 
 # Setup logging
 logging.basicConfig(
@@ -18,66 +21,212 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
 logging.getLogger().addHandler(console_handler)
 
+class SyncScheduler:
+    """
+    Coalesces zone file changes into sync rounds (trailing-edge debounce).
+    Each change marks its file dirty and restarts the quiet timer. Once no
+    change has arrived for `quiet_seconds`, or the oldest pending change is
+    `max_delay` seconds old, every dirty file goes out in a single round
+    (one request per slave). Changes arriving while a round is running are
+    sent in the next one, so the final version of each file always reaches
+    the slaves.
+    
+    A file marked as still being written (complete=False) is held back
+    until a completing event arrives, so half-written zones are never
+    sent; if that never happens it is released after `max_delay`.
+    """
+    
+    def __init__(self, sync, quiet_seconds=None, max_delay=None):
+        self._sync = sync
+        self.quiet_seconds = quiet_seconds if quiet_seconds is not None else config.WATCHER_DEBOUNCE_SECONDS
+        self.max_delay = max_delay if max_delay is not None else config.WATCHER_MAX_DELAY
+        self._cond = threading.Condition()
+        self._dirty = {}
+        self._writing = {}
+        self._last_change = None
+        self._stopping = False
+        self.changes = 0
+        self.coalesced = 0
+        self.rounds = 0
+        self._thread = threading.Thread(target=self._run, name='sync-scheduler', daemon=True)
+        self._thread.start()
+    
+    def mark(self, filename, complete=True):
+        """Record a change to filename; the sync happens on the trailing edge"""
+        with self._cond:
+            now = time.monotonic()
+            self.changes += 1
+            if filename in self._dirty:
+                self.coalesced += 1
+            else:
+                self._dirty[filename] = now
+            if complete:
+                self._writing.pop(filename, None)
+            else:
+                self._writing.setdefault(filename, now)
+            self._last_change = now
+            self._cond.notify()
+    
+    def _ready(self, now):
+        return [f for f in self._dirty
+                if f not in self._writing or now - self._writing[f] >= self.max_delay]
+    
+    def _remaining(self, now, ready):
+        if not ready:
+            # Everything pending is still being written
+            return min(self._writing.values()) + self.max_delay - now
+        quiet_left = self._last_change + self.quiet_seconds - now
+        overdue_left = min(self._dirty[f] for f in ready) + self.max_delay - now
+        return min(quiet_left, overdue_left)
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._stopping:
+                    self._cond.wait()
+                if not self._dirty:
+                    return
+                now = time.monotonic()
+                if self._stopping:
+                    ready = list(self._dirty)
+                else:
+                    ready = self._ready(now)
+                    remaining = self._remaining(now, ready)
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        continue
+                batch = sorted(ready)
+                for filename in batch:
+                    del self._dirty[filename]
+                    self._writing.pop(filename, None)
+                self.rounds += 1
+            
+            try:
+                self._sync(batch)
+            except Exception as e:
+                logging.error(f"EXCEPTION during sync round: {e}")
+    
+    def stop(self):
+        """Send whatever is still pending, then stop the scheduler thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+    
+    def stats(self):
+        with self._cond:
+            return {
+                'pending': len(self._dirty),
+                'writing': len(self._writing),
+                'changes': self.changes,
+                'coalesced': self.coalesced,
+                'rounds': self.rounds
+            }
+
+
 class ZoneFileHandler(FileSystemEventHandler):
     """
     Watches for changes in the DNS zone directory.
-    When a zone file (.hosts or .rev) is modified, it triggers a sync to NS2.
+    When a zone file (.hosts or .rev) is written, created or renamed into
+    place, it schedules a sync to the slaves; bursts of changes are
+    coalesced by SyncScheduler.
+    
+    With close_events (inotify), a modification only marks the file as
+    being written and the sync waits for the writer to close it, so
+    partial writes are never propagated. Without them, modifications
+    count as complete and the debounce alone covers the write.
     """
     
-    def __init__(self):
-        self.last_sync = {}
-        self.debounce_seconds = 5
+    def __init__(self, syncer=None, close_events=False, outbox=None):
+        self.syncer = syncer or SlaveSyncer()
+        self.close_events = close_events
+        # Syncs go through the durable outbox, which retries failed slaves
+        self.outbox = outbox or SyncOutbox(self.syncer)
+        self.scheduler = SyncScheduler(self.sync_slaves)
+        self.outbox.start(on_idle=self.write_stats)
+
+    @staticmethod
+    def zone_filename(path):
+        """Basename of path if it names a zone file, else None (no filesystem access)"""
+        filename = os.path.basename(path)
+        if not (filename.endswith(config.FORWARD_ZONE_PATTERN) or filename.endswith(config.REVERSE_ZONE_PATTERN)):
+            return None
+        # Editor lock/backup files such as .#example.com.hosts
+        if filename.startswith(('.', '#')):
+            return None
+        return filename
+
+    @staticmethod
+    def is_complete(path):
+        """A zone file worth syncing exists, is a regular file and is not empty"""
+        try:
+            return os.path.isfile(path) and os.path.getsize(path) > 0
+        except OSError:
+            return False
+
+    def _changed(self, path, complete, reason):
+        filename = self.zone_filename(path)
+        if filename is None:
+            return
+        if complete and not self.is_complete(path):
+            return
+        logging.info(f"File {reason}: {filename}. Scheduling slave sync...")
+        self.scheduler.mark(filename, complete=complete)
 
     def on_modified(self, event):
         if event.is_directory:
             return
-            
-        filename = os.path.basename(event.src_path)
-        
-        # Only interest in our zone files
-        if filename.endswith(config.FORWARD_ZONE_PATTERN) or filename.endswith(config.REVERSE_ZONE_PATTERN):
-            
-            # Debounce: Prevent double firing for the same file in short succession
-            current_time = time.time()
-            if filename in self.last_sync:
-                if (current_time - self.last_sync[filename]) < self.debounce_seconds:
-                    return
-            
-            self.last_sync[filename] = current_time
-            logging.info(f"File modified: {filename}. Triggering slave sync...")
-            self.sync_slaves(filename)
+        self._changed(event.src_path, complete=not self.close_events, reason='modified')
 
-    def sync_slaves(self, filename):
-        """Sends HTTP sync triggers to all slaves"""
-        import requests
-        
-        if not config.SLAVE_SERVERS:
-            logging.warning("No SLAVE_SERVERS configured. Skipping sync.")
+    def on_closed(self, event):
+        # IN_CLOSE_WRITE: the writer has finished
+        if event.is_directory:
             return
+        self._changed(event.src_path, complete=True, reason='written')
 
-        port = config.SLAVE_API_PORT
-        secret = config.SLAVE_SECRET
-        
-        payload = {
-            'filename': filename,
-            'secret': secret
-        }
+    def on_created(self, event):
+        if event.is_directory:
+            return
+        # A new file is normally still empty here and will be written and
+        # closed next; one that already has content was moved in from outside
+        complete = not self.close_events or self.is_complete(event.src_path)
+        self._changed(event.src_path, complete=complete, reason='created')
+
+    def on_moved(self, event):
+        # Atomic replace: a temporary file renamed over the zone file
+        if event.is_directory:
+            return
+        self._changed(event.dest_path, complete=True, reason='replaced')
+
+    def sync_slaves(self, filenames):
+        """Queues a sync of filenames for every slave; the outbox sends them in parallel"""
+        directory = config.NAMED_ZONE_DIR
+        present = [f for f in filenames if self.is_complete(os.path.join(directory, f))]
+        for filename in sorted(set(filenames) - set(present)):
+            logging.warning(f"Skipping sync of {filename}: no longer present or empty")
+        if not present:
+            return
+        if not self.syncer.hosts:
+            logging.warning("No SLAVE_SERVERS configured. Skipping sync.")
+            return
         
-        for host in config.SLAVE_SERVERS:
-            url = f"http://{host}:{port}/sync"
-            
-            try:
-                logging.info(f"Syncing to {host} via API...")
-                
-                resp = requests.post(url, json=payload, timeout=5)
-                
-                if resp.status_code == 200:
-                    logging.info(f"SUCCESS: Synced {filename} to {host}.")
-                else:
-                    logging.error(f"FAILURE: {host} returned {resp.status_code}: {resp.text}")
-                    
-            except Exception as e:
-                logging.error(f"EXCEPTION syncing to {host}: {str(e)}")
+        logging.info(f"Syncing {len(present)} file(s) to slaves: {', '.join(present)}")
+        self.outbox.add(present)
+
+    def write_stats(self):
+        stats = self.syncer.stats()
+        stats['scheduler'] = self.scheduler.stats()
+        stats['outbox'] = self.outbox.stats()
+        self.syncer.write_stats(stats=stats)
+
+
+def _has_close_events(observer):
+    try:
+        from watchdog.observers.inotify import InotifyObserver
+    except ImportError:
+        return False
+    return isinstance(observer, InotifyObserver) and hasattr(FileSystemEventHandler, 'on_closed')
+
 
 def start_watcher():
     path = config.NAMED_ZONE_DIR
@@ -90,8 +239,11 @@ def start_watcher():
     logging.info(f"Configured Slaves: {config.SLAVE_SERVERS}")
     logging.info(f"Slave API Port: {config.SLAVE_API_PORT}")
 
-    event_handler = ZoneFileHandler()
     observer = Observer()
+
+    # inotify reports close-after-write, so syncs can wait for writers to finish
+    event_handler = ZoneFileHandler(close_events=_has_close_events(observer))
+    logging.info(f"Sync workers: {event_handler.syncer.workers}, timeout: {config.SLAVE_SYNC_TIMEOUT}s")
     observer.schedule(event_handler, path, recursive=False)
     observer.start()
     
@@ -102,6 +254,9 @@ def start_watcher():
         observer.stop()
     
     observer.join()
+    event_handler.scheduler.stop()
+    event_handler.outbox.stop()
+    event_handler.syncer.close()
 
 
 if __name__ == "__main__":
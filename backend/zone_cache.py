@@ -0,0 +1,180 @@
+import os
+import threading
+from collections import OrderedDict
+from config import config
+from dns_parser import DNSParser, RecordIndex
+
+
+class ZoneCache:
+    """
+    Process-wide LRU cache of parsed zone files.
+    Entries are keyed on the zone path and validated against the file
+    identity (inode, mtime_ns, size), so any change on disk is a miss.
+    """
+    
+    def __init__(self, max_records=None, max_bytes=None):
+        self.max_records = max_records if max_records is not None else config.ZONE_CACHE_MAX_RECORDS
+        self.max_bytes = max_bytes if max_bytes is not None else config.ZONE_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._reset_counters()
+    
+    def _after_fork(self):
+        """Give a forked worker a fresh lock; entries stay valid (copy-on-write)"""
+        self._lock = threading.Lock()
+    
+    def _reset_counters(self):
+        self.total_records = 0
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def file_identity(path):
+        """Return the (inode, mtime_ns, size) identity of a zone file"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Zone file not found: {path}")
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def get(self, path, copy=False):
+        """
+        Return parsed zone data ({'ttl', 'soa', 'records'}) for path.
+        The cached object is shared between requests and must be treated as
+        read-only; pass copy=True to get a private copy whose records list and
+        SOA can be modified (record dicts are shared, so replace them rather
+        than editing them in place).
+        """
+        identity = self.file_identity(path)
+        
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry['identity'] == identity:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                data = entry['data']
+            else:
+                self.misses += 1
+                data = None
+        
+        if data is None:
+            parser = DNSParser(path)
+            data = parser.parse()
+            # Only cache if the file did not change while we were parsing it
+            if self.file_identity(path) == identity:
+                self._store(path, identity, data, parser.layout())
+        
+        return self.copy_zone(data) if copy else data
+    
+    def get_indexed(self, path):
+        """
+        Return (data, RecordIndex) for path. Both are shared and read-only;
+        the index is built on first use and kept with the cache entry.
+        """
+        data = self.get(path)
+        
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry['data'] is data and entry.get('index'):
+                return data, entry['index']
+        
+        index = RecordIndex(data['records'])
+        
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry['data'] is data:
+                entry['index'] = index
+        
+        return data, index
+    
+    @staticmethod
+    def copy_zone(data):
+        """Copy parsed zone data deep enough for record-level mutation"""
+        return {
+            'ttl': data['ttl'],
+            'soa': dict(data['soa']) if data.get('soa') else data.get('soa'),
+            'records': list(data['records'])
+        }
+    
+    def get_layout(self, path, data):
+        """
+        Return (layout, identity) of the cached parse `data` for in-place
+        patching (see DNSParser.patch_zone_file), or (None, None).
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry['data'] is data and entry['layout']:
+                return entry['layout'], entry['identity']
+        return None, None
+    
+    def _store(self, path, identity, data, layout=None):
+        record_count = len(data['records'])
+        size = identity[2]
+        
+        # A zone bigger than the whole budget is never cached
+        if record_count > self.max_records or size > self.max_bytes:
+            return
+        
+        with self._lock:
+            self._discard(path)
+            self._entries[path] = {
+                'identity': identity,
+                'data': data,
+                'layout': layout,
+                'records': record_count,
+                'bytes': size
+            }
+            self.total_records += record_count
+            self.total_bytes += size
+            
+            # Evict least recently used entries until we are within budget
+            while self.total_records > self.max_records or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+    
+    def _discard(self, path):
+        """Remove an entry; caller must hold the lock"""
+        entry = self._entries.pop(path, None)
+        if entry:
+            self.total_records -= entry['records']
+            self.total_bytes -= entry['bytes']
+        return entry is not None
+    
+    def invalidate(self, path):
+        """Drop the cached entry for path (called after the zone is written)"""
+        with self._lock:
+            if self._discard(path):
+                self.invalidations += 1
+    
+    def clear(self):
+        """Drop every entry and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._reset_counters()
+    
+    def stats(self):
+        """Return cache counters for sizing"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'records': self.total_records,
+                'bytes': self.total_bytes,
+                'max_records': self.max_records,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+zone_cache = ZoneCache()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=zone_cache._after_fork)
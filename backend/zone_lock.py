@@ -0,0 +1,56 @@
+import os
+import fcntl
+import threading
+from contextlib import contextmanager
+from config import config
+
+# One in-process lock per zone path; _registry_lock only guards creation
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """A forked child must not inherit locks held by another parent thread"""
+    global _locks, _registry_lock
+    _locks = {}
+    _registry_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _thread_lock(zone_path):
+    with _registry_lock:
+        lock = _locks.get(zone_path)
+        if lock is None:
+            lock = _locks[zone_path] = threading.Lock()
+        return lock
+
+
+def _lock_file_path(zone_path):
+    """Lock file for a zone, shared by every worker process"""
+    os.makedirs(config.ZONE_LOCK_DIR, exist_ok=True)
+    return os.path.join(config.ZONE_LOCK_DIR, os.path.basename(zone_path) + '.lock')
+
+
+@contextmanager
+def zone_lock(zone_path):
+    """
+    Serialize read-modify-write cycles on one zone file.
+    Takes a per-zone thread lock, then an exclusive fcntl lock on the zone's
+    lock file so other worker processes wait too. Different zones never
+    contend with each other.
+    """
+    zone_path = os.path.abspath(zone_path)
+    
+    with _thread_lock(zone_path):
+        fd = os.open(_lock_file_path(zone_path), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
@@ -1,12 +1,16 @@
 // API Base URL
 const API_BASE = '/api';
 
+// Records fetched per request; the server filters and pages large zones
+const RECORDS_PAGE_SIZE = 1000;
+
 // Global state
 const state = {
     token: localStorage.getItem('dns_manager_token') || null,
     user: null,
     currentZone: null,
     zoneData: null,
+    recordsTotal: 0, // Matching records on the server (may exceed the loaded page)
     allZones: [], // Store for search filtering
     users: [] // Store for user management
 };
@@ -15,6 +19,27 @@ const state = {
 // API Functions
 // ===========================
 
+// Last ETag and body of conditional GETs, keyed by URL
+const conditionalCache = new Map();
+
+async function conditionalGet(url) {
+    const headers = { 'Authorization': `Bearer ${state.token}` };
+    const cached = conditionalCache.get(url);
+    if (cached) headers['If-None-Match'] = cached.etag;
+
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) return cached.body;
+
+    const body = await response.json();
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        conditionalCache.set(url, { etag, body });
+    } else {
+        conditionalCache.delete(url);
+    }
+    return body;
+}
+
 const api = {
     // Authentication
     async login(username, password) {
@@ -75,21 +100,15 @@ const api = {
 
     // Zones
     async getZones() {
-        const response = await fetch(`${API_BASE}/zones`, {
-            headers: {
-                'Authorization': `Bearer ${state.token}`
-            }
-        });
-        return await response.json();
+        return await conditionalGet(`${API_BASE}/zones`);
     },
 
-    async getZoneRecords(zoneFile) {
-        const response = await fetch(`${API_BASE}/zones/${zoneFile}/records`, {
-            headers: {
-                'Authorization': `Bearer ${state.token}`
-            }
-        });
-        return await response.json();
+    async getZoneRecords(zoneFile, query = {}) {
+        let url = `${API_BASE}/zones/${zoneFile}/records`;
+        const params = new URLSearchParams(query);
+        if (params.toString()) url += `?${params}`;
+
+        return await conditionalGet(url);
     },
 
     // Records
@@ -401,9 +420,15 @@ document.getElementById('zone-selector').addEventListener('change', async (e) =>
 async function loadZoneRecords(zoneFile) {
     showLoading(true);
     try {
-        const result = await api.getZoneRecords(zoneFile);
+        // Filtering and paging happen on the server
+        const term = document.getElementById('record-search-input').value.trim();
+        const query = { limit: RECORDS_PAGE_SIZE };
+        if (term) query.q = term;
+
+        const result = await api.getZoneRecords(zoneFile, query);
         if (result.success) {
             state.zoneData = result.data;
+            state.recordsTotal = result.total ?? result.data.records.length;
             displayZoneRecords(result.data.records);
         } else {
             showToast(result.error || 'Failed to load zone records', 'error');
@@ -416,21 +441,13 @@ async function loadZoneRecords(zoneFile) {
     }
 }
 
-// Record Search Filter
-document.getElementById('record-search-input').addEventListener('input', (e) => {
-    if (!state.zoneData) return;
-
-    const term = e.target.value.toLowerCase();
-    const records = state.zoneData.records;
-
-    const filtered = records.filter(r => {
-        const name = getRecordName(r).toLowerCase();
-        const value = getRecordValue(r).toLowerCase();
-        const type = r.type.toLowerCase();
-        return name.includes(term) || value.includes(term) || type.includes(term);
-    });
+// Record Search Filter (debounced, served by the API)
+let recordSearchTimer = null;
+document.getElementById('record-search-input').addEventListener('input', () => {
+    if (!state.currentZone) return;
 
-    displayZoneRecords(filtered);
+    clearTimeout(recordSearchTimer);
+    recordSearchTimer = setTimeout(() => loadZoneRecords(state.currentZone.file), 300);
 });
 
 
@@ -515,6 +532,12 @@ function displayZoneRecords(records) {
         tbody.appendChild(row);
     });
 
+    if (state.recordsTotal > records.length) {
+        const row = document.createElement('tr');
+        row.innerHTML = `<td colspan="5" style="text-align: center; color: var(--color-text-muted);">Showing ${records.length} of ${state.recordsTotal} records. Refine the search to narrow results.</td>`;
+        tbody.appendChild(row);
+    }
+
     updateCommentVisibility();
 }
 
@@ -823,12 +846,17 @@ document.querySelectorAll('.sidebar-btn').forEach(btn => {
 });
 
 // Logs
-async function loadEventLogs() {
+async function loadEventLogs(cursor = null) {
     try {
-        const result = await api.getLogs();
+        const result = await api.getLogs(cursor ? { cursor } : {});
         if (result.success) {
             const tbody = document.getElementById('logs-tbody');
-            tbody.innerHTML = '';
+            if (cursor) {
+                const moreRow = document.getElementById('logs-more-row');
+                if (moreRow) moreRow.remove();
+            } else {
+                tbody.innerHTML = '';
+            }
             result.logs.forEach(log => {
                 const row = document.createElement('tr');
                 row.innerHTML = `
@@ -840,6 +868,15 @@ async function loadEventLogs() {
                 `;
                 tbody.appendChild(row);
             });
+
+            // Older entries are fetched page by page with the server's cursor
+            if (result.next_cursor) {
+                const row = document.createElement('tr');
+                row.id = 'logs-more-row';
+                row.innerHTML = `<td colspan="5" style="text-align: center;"><button class="btn btn-secondary">Load older entries</button></td>`;
+                row.querySelector('button').addEventListener('click', () => loadEventLogs(result.next_cursor));
+                tbody.appendChild(row);
+            }
         }
     } catch (e) { console.error(e); }
 }
@@ -848,6 +885,7 @@ document.getElementById('logout-btn').addEventListener('click', async () => {
     await api.logout();
     state.token = null;
     state.user = null;
+    conditionalCache.clear();
     localStorage.removeItem('dns_manager_token');
     showPage('login-page');
 });
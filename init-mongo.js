@@ -52,6 +52,8 @@ db.createCollection('users', {
     }
 });
 
+// Keep in sync with EventLog.VALIDATOR in backend/models.py, which the
+// application applies (collMod) to databases created by older versions
 db.createCollection('event_logs', {
     validator: {
         $jsonSchema: {
@@ -67,7 +69,12 @@ db.createCollection('event_logs', {
                     description: 'Username who performed the action'
                 },
                 action: {
-                    enum: ['login', 'logout', 'add_record', 'update_record', 'delete_record', 'reload_zone', 'restart_service'],
+                    enum: [
+                        'login', 'logout',
+                        'add_record', 'update_record', 'delete_record', 'batch_records',
+                        'reload_zone', 'restart_service', 'sync_slave', 'create_zone',
+                        'create_user', 'delete_user'
+                    ],
                     description: 'Type of action performed'
                 },
                 zone: {
@@ -96,9 +103,19 @@ db.createCollection('event_logs', {
 });
 
 // Create indexes for better query performance
+// (the event log retention TTL index is managed by the application at startup)
 db.users.createIndex({ username: 1 }, { unique: true });
-db.event_logs.createIndex({ timestamp: -1 });
-db.event_logs.createIndex({ user: 1, timestamp: -1 });
-db.event_logs.createIndex({ action: 1, timestamp: -1 });
+db.event_logs.createIndex({ timestamp: -1, _id: -1 });
+db.event_logs.createIndex({ user: 1, timestamp: -1, _id: -1 });
+db.event_logs.createIndex({ action: 1, timestamp: -1, _id: -1 });
+db.event_logs.createIndex({ zone: 1, timestamp: -1, _id: -1 });
+
+// Logged-out tokens: removed automatically once the token itself expires
+db.revoked_tokens.createIndex({ jti: 1 }, { unique: true });
+db.revoked_tokens.createIndex({ expires_at: 1 }, { expireAfterSeconds: 0 });
+db.revoked_tokens.createIndex({ revoked_at: 1 });
+
+// Hourly analytics rollups, one document per hour and dimension combination
+db.event_rollups.createIndex({ hour: 1, action: 1, status: 1, user: 1, zone: 1 }, { unique: true });
 
 print('DNS Manager database initialized successfully');
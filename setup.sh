@@ -242,10 +242,10 @@ if [ "$MODE" == "master" ]; then
 import os
 import sys
 sys.path.insert(0, '$SCRIPT_DIR/backend')
-from models import User
+from models import User, ensure_indexes
 from dotenv import load_dotenv
 load_dotenv()
-User.create_indexes()
+ensure_indexes()
 result = User.create(os.getenv('DEFAULT_ADMIN_USERNAME'), os.getenv('DEFAULT_ADMIN_PASSWORD'), role='admin')
 if result.get('success'): print("✅ Admin Created")
 PYTHON_SCRIPT
@@ -262,7 +262,10 @@ Type=simple
 User=root
 WorkingDirectory=$SCRIPT_DIR/backend
 Environment="PATH=$SCRIPT_DIR/venv/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin"
-ExecStart=$SCRIPT_DIR/venv/bin/python app.py
+ExecStart=$SCRIPT_DIR/venv/bin/gunicorn -c gunicorn.conf.py app:app
+ExecReload=/bin/kill -s HUP \$MAINPID
+KillMode=mixed
+TimeoutStopSec=40
 Restart=always
 
 [Install]